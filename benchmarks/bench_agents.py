@@ -0,0 +1,97 @@
+"""Remote execution: a batch spread over several agents on localhost
+
+Starts AGENTS agent processes (``main.py agent``) with SLOTS slots each on
+free loopback ports, runs COUNT copies of a command through an AgentPool
+and prints wall time and the throughput of every agent, then the same
+batch run locally with as many slots in total for comparison.
+
+Usage: python benchmarks/bench_agents.py [AGENTS] [SLOTS] [COUNT] [COMMAND]
+       (default: 3 4 600 "sleep 0.05"; POSIX only)
+"""
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from launcher.engine import ExecutionEngine
+from launcher.remote import AgentPool
+from launcher.tracker import ProcessTracker
+
+DEFAULT_COMMAND = "sleep 0.05"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_agents(count, slots):
+    """Agent processes and their addresses, once every one is listening"""
+    agents = []
+    for index in range(count):
+        port = free_port()
+        process = subprocess.Popen([sys.executable, str(ROOT / "main.py"), 'agent',
+                                    '--port', str(port), '--slots', str(slots),
+                                    '--name', f"agent{index + 1}"],
+                                   stdout=subprocess.PIPE, text=True)
+        # The agent prints one line once it listens
+        process.stdout.readline()
+        agents.append((process, f"127.0.0.1:{port}"))
+    return agents
+
+
+def run_batch(engine, command, count, parallel, executor=None):
+    async def batch():
+        semaphore = asyncio.Semaphore(parallel)
+
+        async def one(i):
+            async with semaphore:
+                record = await engine.run_with_policy({'name': f"cmd-{i}", 'command': command},
+                                                      executor=executor)
+                return record.returncode
+
+        codes = await asyncio.gather(*(one(i) for i in range(count)))
+        return sum(1 for code in codes if code != 0)
+
+    start = time.perf_counter()
+    failures = engine.run_coroutine(batch()).result()
+    return time.perf_counter() - start, failures
+
+
+def main(argv):
+    agent_count = int(argv[0]) if argv else 3
+    slots = int(argv[1]) if len(argv) > 1 else 4
+    count = int(argv[2]) if len(argv) > 2 else 600
+    command = argv[3] if len(argv) > 3 else DEFAULT_COMMAND
+
+    agents = start_agents(agent_count, slots)
+    engine = ExecutionEngine(ProcessTracker(), max_workers=agent_count * slots)
+    pool = AgentPool([address for _, address in agents])
+    try:
+        errors = engine.run_coroutine(pool.connect()).result()
+        for error in errors:
+            print(f"Agent unavailable: {error}")
+        print(f"{count} x '{command}' on {len(pool.connected)} agent(s) x {slots} slot(s)")
+        wall, failures = run_batch(engine, command, count, agent_count * slots, pool)
+        print(f"agents: {wall:.2f} s wall, {count / wall:.1f} commands/s, {failures} failed")
+        for line in pool.report():
+            print(f"  {line}")
+        engine.run_coroutine(pool.close()).result()
+
+        wall, failures = run_batch(engine, command, count, agent_count * slots)
+        print(f" local: {wall:.2f} s wall, {count / wall:.1f} commands/s, {failures} failed")
+    finally:
+        engine.close()
+        for process, _ in agents:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
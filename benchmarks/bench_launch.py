@@ -0,0 +1,130 @@
+"""Launch overhead: a thread per command vs. the asyncio ExecutionEngine
+
+Both sides run COUNT copies of a short shell command with captured output,
+up to PARALLEL at a time (default: all at once), and wait for every one to
+exit. The default command sleeps briefly so that the commands overlap, as
+the commands of a real batch do.
+
+Usage: python benchmarks/bench_launch.py [COUNT] [PARALLEL] [COMMAND]
+       (default: 1000 1000 "sleep 0.5"; POSIX only)
+"""
+import asyncio
+import resource
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from launcher.engine import ExecutionEngine
+from launcher.tracker import ProcessTracker
+
+DEFAULT_COMMAND = "sleep 0.5"
+
+
+def cpu_seconds():
+    """CPU time of this process and its reaped children, user plus system"""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime, children.ru_utime + children.ru_stime
+
+
+class ThreadCounter:
+    """Samples threading.active_count() to find the peak during a run"""
+
+    def __init__(self):
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self):
+        while not self._stop.wait(0.005):
+            self.peak = max(self.peak, threading.active_count())
+
+
+def measure(run):
+    own_before, children_before = cpu_seconds()
+    with ThreadCounter() as counter:
+        start = time.perf_counter()
+        failures = run()
+        wall = time.perf_counter() - start
+    own_after, children_after = cpu_seconds()
+    return {
+        'wall_s': wall,
+        'cpu_s': own_after - own_before,
+        'children_cpu_s': children_after - children_before,
+        'peak_threads': counter.peak,
+        'failures': failures,
+    }
+
+
+def run_threads(command, count, parallel):
+    """One thread per command, each blocked in Popen.communicate()"""
+    failures = []
+    slots = threading.Semaphore(parallel)
+
+    def worker():
+        with slots:
+            process = subprocess.Popen(command, shell=True, stdin=subprocess.DEVNULL,
+                                       stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                       start_new_session=True)
+            process.communicate()
+            if process.returncode != 0:
+                failures.append(process.returncode)
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(failures)
+
+
+def run_engine(command, count, parallel):
+    """Every command spawned, waited on and drained by the engine's event loop"""
+    engine = ExecutionEngine(ProcessTracker(), max_workers=parallel)
+    try:
+        async def batch():
+            semaphore = asyncio.Semaphore(parallel)
+
+            async def one(i):
+                async with semaphore:
+                    record = await engine.run_command({'name': f"cmd-{i}", 'command': command})
+                    return record.returncode
+
+            codes = await asyncio.gather(*(one(i) for i in range(count)))
+            return sum(1 for code in codes if code != 0)
+
+        return engine.run_coroutine(batch()).result()
+    finally:
+        engine.close()
+
+
+def main(argv):
+    count = int(argv[0]) if argv else 1000
+    parallel = int(argv[1]) if len(argv) > 1 else count
+    command = argv[2] if len(argv) > 2 else DEFAULT_COMMAND
+    # Each running command holds a few fds
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    print(f"{count} x '{command}', up to {parallel} at a time")
+    print(f"{'executor':>10} {'wall':>9} {'cpu':>9} {'child cpu':>10} {'threads':>8} {'failed':>7}")
+    for label, run in (('threads', run_threads), ('asyncio', run_engine)):
+        r = measure(lambda: run(command, count, parallel))
+        print(f"{label:>10} {r['wall_s']:>7.2f} s {r['cpu_s']:>7.2f} s {r['children_cpu_s']:>8.2f} s "
+              f"{r['peak_threads']:>8} {r['failures']:>7}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
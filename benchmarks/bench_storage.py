@@ -0,0 +1,74 @@
+"""Save latency of commands.json: full rewrite vs. journaled edit
+
+Usage: python benchmarks/bench_storage.py [SIZE ...]   (default: 10000 100000)
+"""
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from launcher.storage import CommandStore, write_commands
+
+
+def make_catalog(size):
+    return [{'id': i + 1, 'name': f"host-{i:06d} restart",
+             'command': f"ssh host-{i:06d}.example.com 'sudo systemctl restart app'"}
+            for i in range(size)]
+
+
+def time_calls(func, repeat):
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def bench_size(size, repeat=20):
+    commands = make_catalog(size)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "commands.json"
+        write_commands(path, commands)
+
+        # What every edit used to cost: rewrite the whole file in place
+        def rewrite(i):
+            commands[i]['name'] = f"edited {i}"
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(commands, f, indent=2, ensure_ascii=False)
+
+        # Journaled edit: one appended line
+        store = CommandStore(path, compact_every=10 ** 9)
+
+        def journal(i):
+            commands[i]['name'] = f"edited {i}"
+            store.record_update(commands[i]['id'], {'name': commands[i]['name']})
+
+        def compact(i):
+            store.compact(commands, background=False)
+
+        results = {
+            'size': size,
+            'rewrite_ms': time_calls(rewrite, repeat),
+            'journal_ms': time_calls(journal, repeat * 10),
+            'compact_ms': time_calls(compact, 3),
+        }
+        store.close()
+    return results
+
+
+def main(argv):
+    sizes = [int(arg) for arg in argv] or [10000, 100000]
+    print(f"{'commands':>10} {'full rewrite':>14} {'journal edit':>14} {'compaction':>12}")
+    for size in sizes:
+        r = bench_size(size)
+        print(f"{r['size']:>10} {r['rewrite_ms']:>11.2f} ms {r['journal_ms']:>11.3f} ms "
+              f"{r['compact_ms']:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,403 @@
+"""Benchmark suite for the launcher's hot paths, with JSON output
+
+Cases:
+  storage   load (cold JSON parse and warm cache) and save of commands.json
+  tree      CommandListView.reload (the refresh_tree path); needs a display,
+            so it starts Xvfb when DISPLAY is unset and Xvfb is installed
+  launch    launch rate and latency of trivial commands run as a batch
+  spawn     one command at a time: launch and launch-to-exit latency, with
+            and without warm shells
+  reap      time from a process exiting to the engine recording its exit
+  memory    Python heap and RSS per tracked background process
+
+Usage: python benchmarks/suite.py [--only CASE ...] [--sizes N ...]
+                                  [--output results.json] [--compare baseline.json]
+
+Set LAUNCHER_PROFILE=cprofile or tracemalloc to also profile each case
+(see launcher/profiling.py). POSIX only.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from launcher.dag import BatchRun
+from launcher.engine import ExecutionEngine
+from launcher.model import CommandModel
+from launcher.profiling import profiled
+from launcher.shutdown import shutdown_processes
+from launcher.storage import CommandStore, write_commands
+from launcher.tracker import ProcessTracker
+
+CASES = ('storage', 'tree', 'launch', 'spawn', 'reap', 'memory')
+SPAWN_COMMANDS = ('true', 'echo hello', '/bin/true')
+# Relative change beyond which --compare flags a metric
+REGRESSION_THRESHOLD = 0.2
+
+
+def make_catalog(size):
+    return [{'id': i + 1, 'name': f"host-{i:06d} restart",
+             'command': f"ssh host-{i:06d}.example.com 'sudo systemctl restart app'"}
+            for i in range(size)]
+
+
+def median_ms(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def distribution_ms(values):
+    ordered = sorted(value * 1000 for value in values)
+    return {
+        'p50': ordered[len(ordered) // 2],
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'max': ordered[-1],
+    }
+
+
+def repeats_for(size):
+    return 5 if size <= 10000 else 2
+
+
+def load_into_model(store):
+    """What the GUI's loader does: snapshot batches into the model, then journals"""
+    model = CommandModel()
+    for batch in store.iter_snapshot():
+        model.extend(batch, defer=True)
+    store.read_journals()
+    model.reserve_ids(store.next_id)
+    model.assign_deferred()
+    return model
+
+
+# Cases
+
+def bench_storage(sizes):
+    results = {}
+    for size in sizes:
+        repeat = repeats_for(size)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "commands.json"
+            write_commands(path, make_catalog(size))
+            store = CommandStore(path)
+
+            def cold():
+                store.cache_path.unlink(missing_ok=True)
+                load_into_model(store)
+
+            load_cold_ms = median_ms(cold, repeat)
+            store.write_cache(store.load())
+            load_warm_ms = median_ms(lambda: load_into_model(store), repeat)
+
+            model = load_into_model(store)
+            store.source = model.to_list
+            save_ms = median_ms(lambda: store.compact(background=False), repeat)
+            journal_ms = median_ms(lambda: store.record_update(1, {'name': "edited"}), 100)
+            store.close()
+
+        results[str(size)] = {
+            'load_cold_ms': load_cold_ms,
+            'load_warm_ms': load_warm_ms,
+            'save_ms': save_ms,
+            'journal_edit_ms': journal_ms,
+        }
+    return results
+
+
+def open_display():
+    """A Tk root, starting Xvfb if there is no display; returns (root, xvfb) or a reason"""
+    import tkinter as tk
+    xvfb = None
+    if not os.environ.get('DISPLAY') and shutil.which('Xvfb'):
+        display = ':99'
+        xvfb = subprocess.Popen(['Xvfb', display, '-screen', '0', '1280x1024x24'],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        os.environ['DISPLAY'] = display
+        time.sleep(1.0)
+    try:
+        return tk.Tk(), xvfb
+    except tk.TclError as e:
+        if xvfb is not None:
+            xvfb.terminate()
+        return None, f"no display: {e}"
+
+
+def bench_tree(sizes):
+    root, xvfb = open_display()
+    if root is None:
+        return {'skipped': xvfb}
+
+    from launcher.commandlist import CommandListView
+    results = {}
+    try:
+        for size in sizes:
+            model = CommandModel(make_catalog(size))
+            view = CommandListView(root, model)
+            root.update()
+
+            def reload():
+                view.reload()
+                root.update_idletasks()
+
+            first_ms = median_ms(reload, 1)
+            results[str(size)] = {
+                'virtual': view.virtual,
+                'first_reload_ms': first_ms,
+                'reload_ms': median_ms(reload, repeats_for(size)),
+            }
+            view.tree.destroy()
+            view.v_scrollbar.destroy()
+            view.h_scrollbar.destroy()
+    finally:
+        root.destroy()
+        if xvfb is not None:
+            xvfb.terminate()
+    return results
+
+
+def bench_launch(count):
+    """Run ``count`` trivial commands as one batch with every slot open
+
+    ``spawn_ms`` is the cost of one launch (job start to process running);
+    ``latency_ms`` is the time from starting the batch to each process
+    running, which is what a user clicking "Run All" waits for.
+    """
+    tracker = ProcessTracker(history=count)
+    engine = ExecutionEngine(tracker, max_workers=count)
+    spawns = []
+
+    async def job(cmd):
+        dispatched = time.time()
+        # run_command spawns before its first await, so start_time marks the launch
+        record = await engine.run_command(cmd)
+        spawns.append(record.start_time - dispatched)
+        return record.returncode == 0
+
+    commands = [{'id': i, 'name': f"noop-{i}", 'command': "true"} for i in range(count)]
+    try:
+        batch = BatchRun(commands, engine, job)
+        started = time.time()
+        start = time.perf_counter()
+        batch.start()
+        batch.wait()
+        wall = time.perf_counter() - start
+    finally:
+        engine.close()
+
+    starts = [record.start_time for record in tracker.recent]
+    spawn_window = max(max(starts) - min(starts), 1e-9)
+    return {
+        'count': count,
+        'failed': batch.counts()['failed'],
+        'wall_s': wall,
+        'launches_per_s': count / spawn_window,
+        'spawn_ms': distribution_ms(spawns),
+        'latency_ms': distribution_ms([start_time - started for start_time in starts]),
+    }
+
+
+def bench_spawn(samples):
+    """Isolated launches, as when a user runs one command at a time
+
+    ``launch_ms`` runs from calling ``run_command`` to the process running
+    the command; ``exit_ms`` until its exit has been recorded.
+    """
+    results = {}
+    for mode, warm_shells in (('cold', 0), ('warm', 4)):
+        engine = ExecutionEngine(ProcessTracker(), max_workers=1, warm_shells=warm_shells)
+        try:
+            results[mode] = {}
+            for command in SPAWN_COMMANDS:
+                cmd = {'name': "spawn", 'command': command}
+                launches, exits = [], []
+                for _ in range(samples):
+                    # Idle time between launches, in which the warm pool refills
+                    time.sleep(0.005)
+                    called = time.time()
+                    record = engine.run_coroutine(engine.run_command(cmd)).result()
+                    launches.append(record.start_time - called)
+                    exits.append(record.end_time - called)
+                results[mode][command] = {
+                    'launch_ms': distribution_ms(launches),
+                    'exit_ms': distribution_ms(exits),
+                }
+        finally:
+            engine.close()
+    return results
+
+
+def read_timestamp(output, timeout=1.0):
+    """The number a command printed; its output may still be draining"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return float(output.buffer.getvalue())
+        except ValueError:
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.001)
+
+
+def bench_reap(samples):
+    """The command prints the time and execs away; the gap to end_time is reap latency"""
+    tracker = ProcessTracker()
+    engine = ExecutionEngine(tracker, max_workers=1)
+    cmd = {'name': "reap", 'command': "exec date +%s.%N"}
+    latencies = []
+    try:
+        for _ in range(samples):
+            record = engine.run_coroutine(engine.run_command(cmd)).result()
+            exited = read_timestamp(record.output)
+            if exited is None:
+                return {'skipped': "date +%s.%N is not supported here"}
+            latencies.append(record.end_time - exited)
+    finally:
+        engine.close()
+    return {'samples': samples, 'latency_ms': distribution_ms(latencies)}
+
+
+def rss_bytes():
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+def bench_memory(count):
+    """Heap and RSS growth while ``count`` captured processes are tracked"""
+    tracker = ProcessTracker()
+    engine = ExecutionEngine(tracker, max_workers=count)
+    cmd = {'name': "idle", 'command': "sleep 60"}
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        heap_before, _ = tracemalloc.get_traced_memory()
+        rss_before = rss_bytes()
+        for _ in range(count):
+            engine.run_coroutine(engine.run_command(cmd))
+        deadline = time.monotonic() + 30
+        while tracker.count() < count and time.monotonic() < deadline:
+            time.sleep(0.05)
+        heap_after, _ = tracemalloc.get_traced_memory()
+        rss_after = rss_bytes()
+        tracked = tracker.count()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+        shutdown_processes(tracker.records(), timeout=2.0)
+        engine.close()
+
+    result = {
+        'processes': tracked,
+        'heap_bytes_per_process': (heap_after - heap_before) / max(tracked, 1),
+    }
+    if rss_before is not None:
+        result['rss_bytes_per_process'] = (rss_after - rss_before) / max(tracked, 1)
+    return result
+
+
+# Reporting
+
+def flatten(results, prefix=''):
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(current, baseline):
+    """Print metrics that moved by more than REGRESSION_THRESHOLD; returns the regression count"""
+    now = flatten(current['results'])
+    before = flatten(baseline.get('results', {}))
+    regressions = 0
+    for name in sorted(now.keys() & before.keys()):
+        old, new = before[name], now[name]
+        if not old or name.endswith(('.count', '.samples', '.processes', '.failed')):
+            continue
+        change = (new - old) / old
+        # Rates get better as they grow; everything else as it shrinks
+        worse = change < -REGRESSION_THRESHOLD if name.endswith('_per_s') \
+            else change > REGRESSION_THRESHOLD
+        better = change > REGRESSION_THRESHOLD if name.endswith('_per_s') \
+            else change < -REGRESSION_THRESHOLD
+        if worse or better:
+            regressions += worse
+            label = "REGRESSION" if worse else "improved"
+            print(f"{label:>10}  {name}: {old:.4g} -> {new:.4g} ({change:+.0%})", file=sys.stderr)
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the launcher's hot paths")
+    parser.add_argument('--only', nargs='+', choices=CASES, default=list(CASES),
+                        help="cases to run (default: all)")
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000, 100000],
+                        help="catalog sizes for the storage and tree cases")
+    parser.add_argument('--launch-count', type=int, default=500)
+    parser.add_argument('--spawn-samples', type=int, default=100)
+    parser.add_argument('--reap-samples', type=int, default=50)
+    parser.add_argument('--memory-processes', type=int, default=200)
+    parser.add_argument('--output', metavar='PATH', help="write JSON here instead of stdout")
+    parser.add_argument('--compare', metavar='PATH',
+                        help="earlier results to compare against; exits 1 on regressions")
+    args = parser.parse_args(argv)
+
+    runners = {
+        'storage': lambda: bench_storage(args.sizes),
+        'tree': lambda: bench_tree(args.sizes),
+        'launch': lambda: bench_launch(args.launch_count),
+        'spawn': lambda: bench_spawn(args.spawn_samples),
+        'reap': lambda: bench_reap(args.reap_samples),
+        'memory': lambda: bench_memory(args.memory_processes),
+    }
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': {},
+    }
+    for case in CASES:
+        if case in args.only:
+            print(f"Running {case}...", file=sys.stderr)
+            with profiled(f"bench-{case}"):
+                report['results'][case] = runners[case]()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + '\n', encoding='utf-8')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        return 1 if compare(report, baseline) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,3 @@
+"""Execution engine and helpers for Command Launcher"""
+
+__version__ = "1.0.0"
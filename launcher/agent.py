@@ -0,0 +1,290 @@
+"""Agent that runs commands for a launcher on another machine: ``python main.py agent``
+
+The launcher connects over TCP and both sides exchange JSON objects, one
+per line. The launcher opens with ``hello``; the agent answers ``ready``
+(or ``error`` and hangs up if the token is wrong)::
+
+    -> {"type": "hello", "protocol": 1, "token": "..."}
+    <- {"type": "ready", "protocol": 1, "name": "build1:7733", "slots": 8}
+
+after which the launcher sends ``run`` and ``kill`` requests, and the agent
+reports back as each command starts, prints and exits::
+
+    -> {"type": "run", "id": 7, "name": "Build", "command": "make", "timeout": 600}
+    <- {"type": "started", "id": 7, "pid": 4242}
+    <- {"type": "output", "id": 7, "data": "<base64>"}
+    <- {"type": "exit", "id": 7, "returncode": 0, "timed_out": false, "duration": 12.5}
+    -> {"type": "kill", "id": 7}
+
+A command that cannot be started is answered with ``{"type": "failed",
+"id": ..., "message": ...}``. Commands run on the agent's own execution
+engine, at most ``slots`` at a time; when a launcher disconnects, the
+commands it started are stopped.
+
+The agent runs any command it is sent, so it only listens on loopback
+unless it is given a token (``--token`` or LAUNCHER_AGENT_TOKEN), which
+every launcher must then present.
+"""
+import argparse
+import asyncio
+import base64
+import hmac
+import ipaddress
+import json
+import os
+import socket
+import sys
+
+from launcher.engine import ExecutionEngine, default_max_workers
+from launcher.shutdown import shutdown_processes, signal_tree
+from launcher.tracker import ProcessTracker
+
+PROTOCOL_VERSION = 1
+DEFAULT_PORT = 7733
+TOKEN_ENV_VAR = 'LAUNCHER_AGENT_TOKEN'
+# Longest message line; an output message carries at most one pipe read
+MAX_LINE = 1024 * 1024
+HELLO_TIMEOUT = 10.0
+# Seconds to wait for a finished command's output before reporting its exit
+OUTPUT_GRACE = 1.0
+
+
+def encode(message):
+    return json.dumps(message, separators=(',', ':')).encode() + b'\n'
+
+
+async def read_message(reader):
+    """The next message from the peer, or None once it hangs up
+
+    Raises ValueError on a line that is not a JSON object.
+    """
+    try:
+        line = await reader.readline()
+    except (asyncio.LimitOverrunError, ValueError) as e:
+        raise ValueError(f"message too long: {e}")
+    except ConnectionError:
+        return None
+    if not line:
+        return None
+    message = json.loads(line)
+    if not isinstance(message, dict):
+        raise ValueError("message is not an object")
+    return message
+
+
+def is_loopback(host):
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return host == 'localhost'
+
+
+class OutputStream:
+    """Output sink for the engine that forwards each chunk to the launcher
+
+    Once the connection's send buffer is past its high-water mark, ``write``
+    returns ``writer.drain()``; the engine stops reading the command's pipe
+    until it completes, so a slow launcher slows the command down instead of
+    the buffer growing without bound.
+    """
+
+    def __init__(self, send, job_id, writer):
+        self.send = send
+        self.job_id = job_id
+        self.writer = writer
+        self.open_streams = 0
+        self.total = 0
+        self.closed = asyncio.get_running_loop().create_future()
+
+    def write(self, data):
+        self.total += len(data)
+        self.send({'type': 'output', 'id': self.job_id,
+                   'data': base64.b64encode(data).decode('ascii')})
+        transport = self.writer.transport
+        if transport.get_write_buffer_size() > transport.get_write_buffer_limits()[1]:
+            return self.writer.drain()
+        return None
+
+    def stream_closed(self):
+        self.open_streams -= 1
+        if self.open_streams <= 0 and not self.closed.done():
+            self.closed.set_result(None)
+
+
+class Agent:
+    """Serve ``run`` requests from launchers on an ExecutionEngine"""
+
+    def __init__(self, engine, name, token=None):
+        self.engine = engine
+        self.name = name
+        self.token = token
+        self.connections = 0
+        self._handlers = {}
+
+    async def serve(self, host, port):
+        """Start listening; returns the asyncio Server"""
+        return await asyncio.start_server(self._handle, host, port, limit=MAX_LINE)
+
+    async def close(self, server):
+        """Stop listening and hang up on every launcher, stopping their commands"""
+        server.close()
+        for writer in self._handlers.values():
+            writer.close()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    async def _handle(self, reader, writer):
+        peer = writer.get_extra_info('peername')
+        task = asyncio.current_task()
+        self._handlers[task] = writer
+        # Commands of this connection by job id; their records once started
+        jobs = {}
+        accepted = False
+
+        def send(message):
+            if not writer.is_closing():
+                writer.write(encode(message))
+
+        try:
+            hello = await asyncio.wait_for(read_message(reader), HELLO_TIMEOUT)
+            if not self._accept(hello):
+                send({'type': 'error', 'message': "bad hello or token"})
+                print(f"Refused launcher {peer}")
+                return
+            send({'type': 'ready', 'protocol': PROTOCOL_VERSION, 'name': self.name,
+                  'slots': self.engine.max_workers})
+            self.connections += 1
+            accepted = True
+            print(f"Launcher {peer} connected")
+            while True:
+                message = await read_message(reader)
+                if message is None:
+                    break
+                kind = message.get('type')
+                if kind == 'run':
+                    jobs[message.get('id')] = None
+                    self.engine.submit(self._run, message, jobs, send, writer)
+                elif kind == 'kill':
+                    job_id = message.get('id')
+                    if jobs.get(job_id) is None:
+                        # Still queued here: it reports an exit without running
+                        jobs.pop(job_id, None)
+                    else:
+                        self._kill(jobs[job_id])
+        except (asyncio.TimeoutError, ValueError, ConnectionError) as e:
+            print(f"Launcher {peer}: {e}")
+        finally:
+            if accepted:
+                self.connections -= 1
+                print(f"Launcher {peer} disconnected")
+            # Nobody is left to report to; stop what this launcher started
+            for record in list(jobs.values()):
+                self._kill(record)
+            jobs.clear()
+            writer.close()
+            del self._handlers[task]
+
+    def _accept(self, hello):
+        if not hello or hello.get('type') != 'hello':
+            return False
+        if hello.get('protocol') != PROTOCOL_VERSION:
+            return False
+        if self.token is None:
+            return True
+        return hmac.compare_digest(str(hello.get('token', '')).encode(), self.token.encode())
+
+    async def _run(self, message, jobs, send, writer):
+        job_id = message.get('id')
+        if job_id not in jobs:
+            # Killed, or the launcher went away, while it was queued here
+            send({'type': 'exit', 'id': job_id, 'returncode': None, 'timed_out': False,
+                  'duration': 0.0})
+            return False
+        cmd = {'name': str(message.get('name') or job_id), 'command': message.get('command')}
+        if not isinstance(cmd['command'], str):
+            send({'type': 'failed', 'id': job_id, 'message': "no command"})
+            jobs.pop(job_id, None)
+            return False
+        timeout = message.get('timeout')
+        if not isinstance(timeout, (int, float)) or timeout <= 0:
+            timeout = None
+        output = OutputStream(send, job_id, writer)
+
+        def started(record):
+            jobs[job_id] = record
+            send({'type': 'started', 'id': job_id, 'pid': record.pid})
+
+        try:
+            record = await self.engine.run_command(cmd, timeout=timeout, output=output,
+                                                   on_start=started)
+        except OSError as e:
+            send({'type': 'failed', 'id': job_id, 'message': str(e)})
+            jobs.pop(job_id, None)
+            return False
+        try:
+            # Let the launcher see the last of the output before the exit
+            await asyncio.wait_for(asyncio.shield(output.closed), OUTPUT_GRACE)
+        except asyncio.TimeoutError:
+            pass
+        send({'type': 'exit', 'id': job_id, 'returncode': record.returncode,
+              'timed_out': record.timed_out, 'duration': record.duration})
+        jobs.pop(job_id, None)
+        return record.returncode == 0
+
+    def _kill(self, record):
+        if record is None or not record.running:
+            return
+        signal_tree(record)
+        self.engine.loop.call_later(self.engine.KILL_GRACE, self._force_kill, record)
+
+    def _force_kill(self, record):
+        if record.running:
+            signal_tree(record, force=True)
+            record.force_killed = True
+
+
+def build_agent_parser():
+    parser = argparse.ArgumentParser(prog="main.py agent",
+                                     description="Run commands sent by launchers on other machines")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f"port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument('--slots', type=int, default=None,
+                        help=f"commands run at once (default: {default_max_workers()})")
+    parser.add_argument('--name', help="name reported to launchers (default: HOST:PORT)")
+    parser.add_argument('--token', default=os.environ.get(TOKEN_ENV_VAR) or None,
+                        help=f"shared secret launchers must send (default: ${TOKEN_ENV_VAR})")
+    return parser
+
+
+def agent_main(argv):
+    """Entry point for ``main.py agent``; returns the process exit code"""
+    parser = build_agent_parser()
+    args = parser.parse_args(argv)
+    if args.token is None and not is_loopback(args.host):
+        parser.error(f"listening on {args.host} requires --token or {TOKEN_ENV_VAR}")
+    if args.slots is not None and args.slots < 1:
+        parser.error("--slots must be at least 1")
+
+    tracker = ProcessTracker()
+    engine = ExecutionEngine(tracker, max_workers=args.slots, warm_shells=4)
+    name = args.name or f"{socket.gethostname()}:{args.port}"
+    agent = Agent(engine, name, args.token)
+    try:
+        server = engine.run_coroutine(agent.serve(args.host, args.port)).result()
+    except OSError as e:
+        print(f"Cannot listen on {args.host}:{args.port}: {e}", file=sys.stderr)
+        engine.close()
+        return 2
+
+    print(f"Agent {name} listening on {args.host}:{args.port} with "
+          f"{engine.max_workers} slot(s)", flush=True)
+    try:
+        engine.run_coroutine(server.serve_forever()).result()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.run_coroutine(agent.close(server)).result()
+        shutdown_processes(tracker.records())
+        engine.close()
+    return 0
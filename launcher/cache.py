@@ -0,0 +1,195 @@
+"""Skip commands whose inputs have not changed since their last success
+
+A saved command opts in with a ``cache`` entry::
+
+    {"name": "Build", "command": "make",
+     "cache": {"inputs": ["src/**/*.c", "Makefile"], "outputs": ["build/app"]}}
+
+Relative patterns are resolved against the launcher's working directory
+(the directory commands run in), or ``cache["dir"]`` if given.
+"""
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+
+from launcher.storage import write_json
+
+# Files modified this recently may change again within the same mtime tick,
+# so their stat signature is not trusted for the fast path
+RACY_SECONDS = 2.0
+
+
+def cache_spec(cmd):
+    """The command's cache settings, or None if it has not opted in"""
+    spec = cmd.get('cache')
+    if not isinstance(spec, dict) or not spec.get('inputs'):
+        return None
+    return spec
+
+
+def cache_key(cmd):
+    return str(cmd.get('id') if cmd.get('id') is not None else cmd['name'])
+
+
+def expand(patterns, base_dir):
+    """Files matching any of the glob patterns, sorted; patterns that match
+    nothing are returned separately"""
+    files = set()
+    unmatched = []
+    for pattern in patterns:
+        full = os.path.join(base_dir, os.path.expanduser(pattern))
+        matches = [path for path in glob.glob(full, recursive=True) if os.path.isfile(path)]
+        if matches:
+            files.update(os.path.abspath(path) for path in matches)
+        else:
+            unmatched.append(pattern)
+    return sorted(files), unmatched
+
+
+class ResultCache:
+    """Input fingerprints of successful runs, persisted as JSON
+
+    Checking a command globs its inputs and hashes their contents. Hashes
+    are remembered per file together with its size and mtime, so unchanged
+    files are never read again; only new or modified files cost I/O. A
+    command is skipped when its fingerprint (command text plus input
+    hashes) matches its last successful run and its outputs still exist
+    untouched since then.
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, path, base_dir=None):
+        self.path = path
+        self.base_dir = base_dir or os.getcwd()
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._files = {}
+        self._results = {}
+        self._load()
+
+    def check(self, cmd):
+        """``(hit, fingerprint)`` for a command; fingerprint is None if it is not cached"""
+        spec = cache_spec(cmd)
+        if spec is None:
+            return False, None
+
+        base_dir = os.path.join(self.base_dir, spec.get('dir', ''))
+        fingerprint = self.fingerprint(cmd, spec, base_dir)
+        with self._lock:
+            result = self._results.get(cache_key(cmd))
+        hit = (result is not None and result.get('fingerprint') == fingerprint
+               and self._outputs_unchanged(spec, base_dir, result.get('outputs')))
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return hit, fingerprint
+
+    def record_success(self, cmd, fingerprint):
+        """Remember a successful run of a command checked with ``check``"""
+        spec = cache_spec(cmd)
+        if spec is None or fingerprint is None:
+            return
+        base_dir = os.path.join(self.base_dir, spec.get('dir', ''))
+        outputs = self._output_signatures(spec, base_dir)
+        if outputs is None:
+            # A declared output was not produced, so the run proves nothing
+            return
+        with self._lock:
+            self._results[cache_key(cmd)] = {'fingerprint': fingerprint, 'outputs': outputs}
+            self._dirty = True
+
+    def counts(self):
+        with self._lock:
+            return self.hits, self.misses
+
+    def save(self):
+        """Write the cache file if anything changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {'files': dict(self._files), 'results': dict(self._results)}
+            self._dirty = False
+        try:
+            write_json(self.path, data, indent=None)
+        except OSError as e:
+            print(f"Failed to save result cache: {e}")
+
+    def fingerprint(self, cmd, spec, base_dir):
+        digest = hashlib.sha256()
+        digest.update(cmd['command'].encode('utf-8'))
+        files, unmatched = expand(spec['inputs'], base_dir)
+        for path in files:
+            digest.update(b'\0' + path.encode('utf-8', 'surrogateescape') + b'\0')
+            digest.update(self.file_hash(path).encode('ascii'))
+        for pattern in unmatched:
+            # A file appearing later must change the fingerprint
+            digest.update(b'\0missing\0' + pattern.encode('utf-8'))
+        return digest.hexdigest()
+
+    def file_hash(self, path):
+        """Content hash of a file, reusing the stored one while size and mtime match"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return 'unreadable'
+        signature = [stat.st_size, stat.st_mtime_ns]
+        with self._lock:
+            known = self._files.get(path)
+        if known is not None and known[:2] == signature:
+            return known[2]
+
+        digest = hashlib.sha256()
+        try:
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(self.CHUNK_SIZE), b''):
+                    digest.update(chunk)
+        except OSError:
+            return 'unreadable'
+        value = digest.hexdigest()
+
+        if time.time() - stat.st_mtime_ns / 1e9 < RACY_SECONDS:
+            # Could be rewritten within the same mtime tick; rehash next time
+            signature = [None, None]
+        with self._lock:
+            self._files[path] = signature + [value]
+            self._dirty = True
+        return value
+
+    def _output_signatures(self, spec, base_dir):
+        outputs = {}
+        files, unmatched = expand(spec.get('outputs', ()), base_dir)
+        if unmatched:
+            return None
+        for path in files:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None
+            outputs[path] = [stat.st_size, stat.st_mtime_ns]
+        return outputs
+
+    def _outputs_unchanged(self, spec, base_dir, recorded):
+        if recorded is None:
+            return False
+        return self._output_signatures(spec, base_dir) == recorded
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable result cache: {e}")
+            return
+        self._files = data.get('files', {})
+        self._results = data.get('results', {})
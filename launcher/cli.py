@@ -0,0 +1,286 @@
+"""Headless batch runner: ``python main.py run <name|--all|--filter PATTERN>``
+
+``python main.py history [NAME...]`` prints timing statistics of past runs.
+
+This module must never import tkinter so it works on hosts without a display.
+"""
+import argparse
+import fnmatch
+import sys
+import threading
+from pathlib import Path
+
+from launcher.cache import ResultCache
+from launcher.dag import BatchNode, BatchRun, DependencyError, with_dependencies
+from launcher.engine import ExecutionEngine, default_max_workers
+from launcher.history import open_history
+from launcher.metrics import ResourceSampler
+from launcher.policy import group_limits
+from launcher.remote import AGENTS_ENV_VAR, AgentPool, agent_addresses, agent_token
+from launcher.shutdown import shutdown_processes
+from launcher.storage import default_data_dir, read_commands
+from launcher.tracker import ProcessTracker
+
+
+def build_run_parser():
+    parser = argparse.ArgumentParser(prog="main.py run",
+                                     description="Run saved commands without the GUI")
+    parser.add_argument('names', nargs='*', metavar='NAME',
+                        help="name of a saved command to run")
+    parser.add_argument('--all', action='store_true', dest='run_all',
+                        help="run every saved command")
+    parser.add_argument('--filter', metavar='PATTERN',
+                        help="run commands whose name matches a glob pattern (case-insensitive)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="run cached commands even if their inputs are unchanged")
+    parser.add_argument('--with-deps', action='store_true',
+                        help="also run the commands the selected ones depend on")
+    parser.add_argument('--file', metavar='PATH',
+                        help="commands file (default: commands.json next to main.py)")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help=f"maximum commands running at once (default: {default_max_workers()}, "
+                             f"or every free agent slot)")
+    parser.add_argument('--agent', action='append', metavar='HOST:PORT', dest='agents',
+                        help=f"run the commands on this agent (repeatable; default: ${AGENTS_ENV_VAR})")
+    return parser
+
+
+def build_history_parser():
+    parser = argparse.ArgumentParser(prog="main.py history",
+                                     description="Show timing statistics of past runs")
+    parser.add_argument('names', nargs='*', metavar='NAME',
+                        help="only show these saved commands")
+    parser.add_argument('--file', metavar='PATH',
+                        help="commands file (default: commands.json next to main.py)")
+    return parser
+
+
+def history_path(data_file):
+    """The run history database kept next to a commands file"""
+    return Path(data_file).with_name("history.db")
+
+
+def select_commands(commands, names=(), run_all=False, pattern=None):
+    """Pick the commands to run; raises KeyError for an unknown name"""
+    if run_all:
+        return list(commands)
+
+    selected = []
+    if names:
+        by_name = {}
+        for cmd in commands:
+            by_name.setdefault(cmd['name'], []).append(cmd)
+        for name in names:
+            if name not in by_name:
+                raise KeyError(name)
+            selected.extend(by_name[name])
+
+    if pattern:
+        pattern = pattern.lower()
+        # Identity, not equality: two saved commands may be identical
+        chosen = {id(cmd) for cmd in selected}
+        selected.extend(cmd for cmd in commands
+                        if id(cmd) not in chosen
+                        and fnmatch.fnmatchcase(cmd['name'].lower(), pattern))
+    return selected
+
+
+def run_main(argv):
+    """Entry point for ``main.py run``; returns the process exit code"""
+    parser = build_run_parser()
+    args = parser.parse_args(argv)
+    if not (args.names or args.run_all or args.filter):
+        parser.error("give a command name, --all or --filter")
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    data_file = args.file or (default_data_dir() / "commands.json")
+    try:
+        commands = read_commands(data_file)
+    except (OSError, ValueError) as e:
+        print(f"Failed to load commands: {e}", file=sys.stderr)
+        return 2
+
+    try:
+        selected = select_commands(commands, args.names, args.run_all, args.filter)
+    except KeyError as e:
+        print(f"No saved command named {e.args[0]!r}", file=sys.stderr)
+        return 2
+    if not selected:
+        print("No commands to run.", file=sys.stderr)
+        return 1
+    if args.with_deps:
+        selected = with_dependencies(selected, commands)
+
+    agents = None
+    addresses = args.agents or agent_addresses()
+    if addresses:
+        try:
+            agents = AgentPool(addresses, agent_token())
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+
+    history = open_history(history_path(data_file))
+    cache = None if args.no_cache else ResultCache(Path(data_file).with_name("result-cache.json"))
+    try:
+        return run_batch(selected, args.jobs, history, cache, group_limits(commands), agents)
+    except DependencyError as e:
+        print(e, file=sys.stderr)
+        return 2
+    finally:
+        if history:
+            history.close()
+        if cache:
+            cache.save()
+
+
+def run_batch(commands, jobs=None, history=None, cache=None, limits=None, agents=None):
+    """Run commands in the background on the execution engine, printing each exit code
+
+    Commands wait for the ones named in their ``depends_on``; raises
+    DependencyError if those form a cycle. With a RunHistory, each run is
+    recorded and the commands expected to take longest start first. With a
+    ResultCache, cached commands whose inputs are unchanged are skipped.
+    Each command's timeout, retries and group limits are enforced (see
+    launcher.policy); ``limits`` overrides the group limits found in
+    ``commands``. With an AgentPool the commands run on its agents, and
+    the summary ends with each agent's throughput.
+    """
+    print_lock = threading.Lock()
+    tracker = ProcessTracker()
+    engine = ExecutionEngine(tracker, max_workers=jobs)
+
+    def report(line):
+        with print_lock:
+            print(line, flush=True)
+
+    if agents is not None:
+        for error in engine.run_coroutine(agents.connect()).result():
+            report(f"[error] {error}")
+        if not agents.connected:
+            report("No agent available")
+            engine.close()
+            return 2
+        if jobs is None:
+            # The agents' slots are the limit
+            engine.set_max_workers(agents.total_slots)
+
+    # Peak memory of each run goes into the history
+    sampler = ResourceSampler(tracker)
+    if history:
+        tracker.on_start = sampler.process_started
+        sampler.start()
+
+    def on_retry(record, attempt, delay):
+        if history:
+            history.add_record(record)
+        reason = "timed out" if record.timed_out else f"exit {record.returncode}"
+        report(f"[retry {attempt}] {record.name} ({reason}) in {delay:.1f}s")
+
+    async def job(cmd):
+        fingerprint = None
+        if cache:
+            hit, fingerprint = await engine.call(cache.check, cmd)
+            if hit:
+                report(f"[cached] {cmd['name']}")
+                return True
+        try:
+            # Output is not captured: it goes straight to our terminal
+            record = await engine.run_with_policy(cmd, capture=False, on_retry=on_retry,
+                                                  executor=agents)
+        except OSError as e:
+            report(f"[error] {cmd['name']}: {e}")
+            return False
+        code = record.returncode
+        if history:
+            history.add_record(record)
+        if code == 0 and fingerprint:
+            await engine.call(cache.record_success, cmd, fingerprint)
+        if record.timed_out:
+            report(f"[timeout] {cmd['name']} after {record.duration:.2f}s (exit {code})")
+        else:
+            report(f"[exit {code}] {cmd['name']} ({record.duration:.2f}s)")
+        return code == 0
+
+    def on_node_done(node):
+        if node.state == BatchNode.SKIPPED:
+            report(f"[skipped] {node.name} ({node.reason})")
+
+    estimates = history.estimates(commands) if history else None
+    batch = BatchRun(commands, engine, job, on_node_done=on_node_done, estimates=estimates,
+                     limits=limits)
+    batch.start()
+
+    try:
+        while not batch.wait(0.5):
+            pass
+    except KeyboardInterrupt:
+        batch.cancel()
+        engine.cancel_pending()
+        if agents is not None:
+            stopped = engine.run_coroutine(agents.stop_all()).result()
+            report(f"[stopped] {stopped} command(s) on agents")
+        running = tracker.records()
+        shutdown_processes(running)
+        for record in running:
+            if record.shutdown_seconds is not None:
+                state = "killed" if record.force_killed else "stopped"
+                report(f"[{state}] {record.name} in {record.shutdown_seconds:.2f}s")
+        report("Interrupted")
+        return 130
+    finally:
+        sampler.stop()
+        if agents is not None:
+            engine.run_coroutine(agents.close()).result()
+        engine.close()
+
+    summary = batch.summary()
+    if cache and (cache.hits or cache.misses):
+        summary += f", cache: {cache.hits} hit(s), {cache.misses} miss(es)"
+    report(summary)
+    _, path = batch.critical_path()
+    if len(path) > 1:
+        report("Critical path: " + " -> ".join(node.name for node in path))
+    if agents is not None:
+        for line in agents.report():
+            report(line)
+    counts = batch.counts()
+    return 0 if counts[BatchNode.FAILED] == counts[BatchNode.SKIPPED] == 0 else 1
+
+
+def history_main(argv):
+    """Entry point for ``main.py history``; returns the process exit code"""
+    args = build_history_parser().parse_args(argv)
+    data_file = args.file or (default_data_dir() / "commands.json")
+    try:
+        commands = read_commands(data_file)
+        if args.names:
+            commands = select_commands(commands, args.names)
+    except (OSError, ValueError) as e:
+        print(f"Failed to load commands: {e}", file=sys.stderr)
+        return 2
+    except KeyError as e:
+        print(f"No saved command named {e.args[0]!r}", file=sys.stderr)
+        return 2
+
+    history = open_history(history_path(data_file))
+    if history is None:
+        return 2
+    try:
+        width = max([len(cmd['name']) for cmd in commands] + [4])
+        print(f"{'NAME':<{width}}  {'RUNS':>5}  {'P50':>8}  {'P95':>8}  LAST EXIT")
+        for cmd in commands:
+            stats = history.stats(cmd.get('id'), cmd['name'])
+            if stats is None:
+                print(f"{cmd['name']:<{width}}  {'-':>5}")
+                continue
+            last = '' if stats.last_exit_code is None else stats.last_exit_code
+            if stats.p50 is None:
+                timing = f"{'-':>8}  {'-':>8}"
+            else:
+                timing = f"{stats.p50:>7.2f}s  {stats.p95:>7.2f}s"
+            print(f"{cmd['name']:<{width}}  {stats.runs:>5}  {timing}  {last}")
+    finally:
+        history.close()
+    return 0
@@ -0,0 +1,334 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class CommandListView:
+    """Treeview of saved commands keyed by command id
+
+    Small catalogs are fully materialized and kept in sync row by row. Once a
+    catalog reaches ``VIRTUAL_THRESHOLD`` commands the view switches to
+    virtual mode: the Treeview only holds the rows in the visible window plus
+    a small margin, the vertical scrollbar is driven from the catalog size,
+    and rows are fetched from the model as the user scrolls. Scrolling,
+    opening and resizing then cost the same whatever the catalog size.
+    """
+
+    VIRTUAL_THRESHOLD = 2000
+    MARGIN = 2
+    # Event state bits of the Shift and Control modifiers
+    EXTEND_MASK = 0x0001 | 0x0004
+
+    def __init__(self, parent, model, timing=None):
+        self.model = model
+        # Optional callable giving the "Timing" column text for a command
+        self.timing = timing
+
+        # Ids in display order and the values last rendered for each materialized row
+        self.order = []
+        self.row_values = {}
+
+        # Virtual mode state
+        self.virtual = False
+        self.first = 0
+        self.page_size = 20
+        self.selected = set()
+        self._rendering = False
+        # Whether the click being handled extends the selection (Ctrl or Shift held)
+        self._extend = False
+
+        # Treeview for commands
+        columns = ('Name', 'Command', 'Timing')
+        self.tree = ttk.Treeview(parent, columns=columns, show='tree headings', selectmode='extended')
+
+        # Configure columns
+        self.tree.heading('#0', text='ID')
+        self.tree.heading('Name', text='Name')
+        self.tree.heading('Command', text='Command')
+        self.tree.heading('Timing', text='Timing')
+
+        self.tree.column('#0', width=50, minwidth=50)
+        self.tree.column('Name', width=200, minwidth=150)
+        self.tree.column('Command', width=400, minwidth=200)
+        self.tree.column('Timing', width=140, minwidth=100)
+
+        # Scrollbars
+        self.v_scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.tree.yview)
+        self.h_scrollbar = ttk.Scrollbar(parent, orient=tk.HORIZONTAL, command=self.tree.xview)
+        self.tree.configure(yscrollcommand=self.v_scrollbar.set, xscrollcommand=self.h_scrollbar.set)
+
+        # Grid the treeview and scrollbars
+        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.v_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.h_scrollbar.grid(row=1, column=0, sticky=(tk.W, tk.E))
+
+        # Virtual mode needs to see scrolling, resizing and selection itself
+        self.tree.bind('<Configure>', self._on_configure)
+        self.tree.bind('<<TreeviewSelect>>', self._on_select)
+        self.tree.bind('<ButtonPress-1>', self._on_click)
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.tree.bind(sequence, self._on_wheel)
+        for sequence in ('<Up>', '<Down>', '<Prior>', '<Next>', '<Home>', '<End>'):
+            self.tree.bind(sequence, self._on_key)
+        self.tree.bind('<Control-a>', self._on_select_all)
+
+    def reload(self, order=None):
+        """Re-read the display order from the model and bring the rows in line"""
+        self.order = self.model.ids() if order is None else list(order)
+        # Decide on the catalog size, not the filtered size, so filtering never flips modes
+        self._set_virtual(len(self.model) >= self.VIRTUAL_THRESHOLD)
+        if self.virtual:
+            self._clamp_first()
+            self._render_window()
+        else:
+            self._render_all()
+
+    def update_rows(self, cmd_ids):
+        """Re-render edited commands; only rows that are materialized are touched"""
+        self._sync([cmd_id for cmd_id in cmd_ids if cmd_id in self.row_values])
+
+    def insert_rows(self, cmd_ids):
+        """Show commands appended to the model"""
+        self.order.extend(cmd_ids)
+        if not self.virtual and len(self.model) >= self.VIRTUAL_THRESHOLD:
+            self.reload(self.order)
+        elif self.virtual:
+            self._render_window()
+        else:
+            self._sync(cmd_ids, append=True)
+
+    def remove_rows(self, cmd_ids):
+        """Drop commands removed from the model"""
+        removed = set(cmd_ids)
+        self.order = [cmd_id for cmd_id in self.order if cmd_id not in removed]
+        self.selected -= removed
+        if self.virtual:
+            self._clamp_first()
+            self._render_window()
+        else:
+            self._sync(cmd_ids)
+
+    def selection(self):
+        """Ids of the selected commands, in display order"""
+        if not self.virtual:
+            return [int(iid) for iid in self.tree.selection()]
+        return [cmd_id for cmd_id in self.order if cmd_id in self.selected]
+
+    def _sync(self, cmd_ids, append=False):
+        # Diff commands against their cached rows and touch only what changed
+        for cmd_id in cmd_ids:
+            iid = str(cmd_id)
+            rendered = self.row_values.get(cmd_id)
+            if cmd_id not in self.model:
+                if rendered is not None:
+                    self.tree.delete(iid)
+                    del self.row_values[cmd_id]
+                continue
+
+            cmd = self.model.get(cmd_id)
+            values = self._values(cmd)
+            if rendered is None:
+                if not append:
+                    continue
+                self.tree.insert('', 'end', iid=iid, text=iid, values=values)
+            elif rendered != values:
+                self.tree.item(iid, values=values)
+            else:
+                continue
+            self.row_values[cmd_id] = values
+
+    def _values(self, cmd):
+        timing = self.timing(cmd) if self.timing else ''
+        return (cmd['name'], cmd['command'], timing)
+
+    def _render_all(self):
+        # Materialize every row in order, leaving unchanged rows alone
+        wanted = set(self.order)
+        stale = [cmd_id for cmd_id in self.row_values if cmd_id not in wanted]
+        if stale:
+            self.tree.delete(*[str(cmd_id) for cmd_id in stale])
+            for cmd_id in stale:
+                del self.row_values[cmd_id]
+
+        for position, cmd_id in enumerate(self.order):
+            iid = str(cmd_id)
+            cmd = self.model.get(cmd_id)
+            values = self._values(cmd)
+            rendered = self.row_values.get(cmd_id)
+            if rendered is None:
+                self.tree.insert('', position, iid=iid, text=iid, values=values)
+            elif rendered != values:
+                self.tree.item(iid, values=values)
+            else:
+                continue
+            self.row_values[cmd_id] = values
+
+        # Rows kept from before may be out of place if the order changed
+        wanted_iids = tuple(str(cmd_id) for cmd_id in self.order)
+        if self.tree.get_children() != wanted_iids:
+            for position, iid in enumerate(wanted_iids):
+                self.tree.move(iid, '', position)
+
+    def _set_virtual(self, virtual):
+        if virtual == self.virtual:
+            return
+        self.virtual = virtual
+        self.selected = set(self.selection()) if virtual else set()
+
+        # Start from an empty tree in the new mode
+        self._rendering = True
+        try:
+            self.tree.delete(*self.tree.get_children())
+        finally:
+            self._rendering = False
+        self.row_values = {}
+        self.first = 0
+
+        if virtual:
+            self.v_scrollbar.configure(command=self._on_scrollbar)
+            self.tree.configure(yscrollcommand='')
+        else:
+            self.v_scrollbar.configure(command=self.tree.yview)
+            self.tree.configure(yscrollcommand=self.v_scrollbar.set)
+
+    def _render_window(self):
+        # Materialize only order[first:first + page_size + MARGIN]
+        window = self.order[self.first:self.first + self.page_size + self.MARGIN]
+        wanted = set(window)
+
+        self._rendering = True
+        try:
+            stale = [str(cmd_id) for cmd_id in self.row_values if cmd_id not in wanted]
+            if stale:
+                self.tree.delete(*stale)
+                for iid in stale:
+                    del self.row_values[int(iid)]
+
+            for position, cmd_id in enumerate(window):
+                iid = str(cmd_id)
+                cmd = self.model.get(cmd_id)
+                values = self._values(cmd)
+                rendered = self.row_values.get(cmd_id)
+                if rendered is None:
+                    self.tree.insert('', position, iid=iid, text=iid, values=values)
+                    self.row_values[cmd_id] = values
+                else:
+                    if rendered != values:
+                        self.tree.item(iid, values=values)
+                        self.row_values[cmd_id] = values
+                    if self.tree.index(iid) != position:
+                        self.tree.move(iid, '', position)
+
+            self.tree.selection_set([str(cmd_id) for cmd_id in window if cmd_id in self.selected])
+            self.tree.yview_moveto(0)
+        finally:
+            self._rendering = False
+
+        total = len(self.order)
+        if total:
+            self.v_scrollbar.set(self.first / total, min(1.0, (self.first + self.page_size) / total))
+        else:
+            self.v_scrollbar.set(0.0, 1.0)
+
+    def _clamp_first(self):
+        self.first = max(0, min(self.first, len(self.order) - self.page_size))
+
+    def scroll_to(self, first):
+        """Move the virtual window so that row ``first`` is at the top"""
+        if not self.virtual:
+            return
+        old_first = self.first
+        self.first = first
+        self._clamp_first()
+        if self.first != old_first:
+            self._render_window()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.scroll_to(int(float(amount) * len(self.order)))
+        elif action == 'scroll':
+            step = self.page_size if unit == 'pages' else 1
+            self.scroll_to(self.first + int(amount) * step)
+
+    def _on_wheel(self, event):
+        if not self.virtual:
+            return None
+        if event.num == 4 or getattr(event, 'delta', 0) > 0:
+            self.scroll_to(self.first - 3)
+        else:
+            self.scroll_to(self.first + 3)
+        return 'break'
+
+    def _on_key(self, event):
+        if not self.virtual:
+            return None
+        focus = self.tree.focus()
+        index = self.order.index(int(focus)) if focus else self.first
+        if event.keysym == 'Up':
+            index -= 1
+        elif event.keysym == 'Down':
+            index += 1
+        elif event.keysym == 'Prior':
+            index -= self.page_size
+        elif event.keysym == 'Next':
+            index += self.page_size
+        elif event.keysym == 'Home':
+            index = 0
+        elif event.keysym == 'End':
+            index = len(self.order) - 1
+        if not self.order:
+            return 'break'
+        index = max(0, min(index, len(self.order) - 1))
+
+        # Keep the focused row inside the visible window
+        if index < self.first:
+            self.scroll_to(index)
+        elif index >= self.first + self.page_size:
+            self.scroll_to(index - self.page_size + 1)
+
+        cmd_id = self.order[index]
+        self.selected = {cmd_id}
+        self._render_window()
+        self.tree.focus(str(cmd_id))
+        return 'break'
+
+    def _on_select_all(self, event):
+        if self.virtual:
+            self.selected = set(self.order)
+            self._render_window()
+        else:
+            self.tree.selection_set(self.tree.get_children())
+        return 'break'
+
+    def _on_click(self, event):
+        # Runs before the Treeview's own binding, which fires <<TreeviewSelect>>
+        self._extend = bool(event.state & self.EXTEND_MASK)
+
+    def _on_select(self, event):
+        if not self.virtual or self._rendering:
+            return
+        extend, self._extend = self._extend, False
+        window = {int(iid) for iid in self.tree.selection()}
+        if not extend:
+            # A plain click replaces the selection, rows outside the window too
+            self.selected = window
+            return
+        # The Treeview only knows about the window; merge its selection into ours
+        self.selected.difference_update(self.row_values)
+        self.selected.update(window)
+
+    def _on_configure(self, event):
+        row_height = self._row_height()
+        # Leave room for the heading row
+        page_size = max(1, event.height // row_height - 1)
+        if page_size != self.page_size:
+            self.page_size = page_size
+            if self.virtual:
+                self._clamp_first()
+                self._render_window()
+
+    def _row_height(self):
+        style = ttk.Style(self.tree)
+        try:
+            return int(style.lookup('Treeview', 'rowheight')) or 20
+        except (ValueError, tk.TclError):
+            return 20
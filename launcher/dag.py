@@ -0,0 +1,376 @@
+import inspect
+import threading
+import time
+
+from launcher.policy import command_group, group_limits
+
+class DependencyError(ValueError):
+    """A batch whose ``depends_on`` declarations form a cycle"""
+
+
+def dependency_names(cmd):
+    """Names a command waits for; ``depends_on`` may be a list or a single name"""
+    depends_on = cmd.get('depends_on') or []
+    if isinstance(depends_on, str):
+        depends_on = [depends_on]
+    return [name for name in depends_on if name]
+
+
+def with_dependencies(commands, catalog):
+    """``commands`` plus everything they transitively depend on, in catalog order"""
+    by_name = {}
+    for cmd in catalog:
+        by_name.setdefault(cmd['name'], []).append(cmd)
+
+    wanted = {id(cmd) for cmd in commands}
+    stack = list(commands)
+    while stack:
+        for name in dependency_names(stack.pop()):
+            for dependency in by_name.get(name, ()):
+                if id(dependency) not in wanted:
+                    wanted.add(id(dependency))
+                    stack.append(dependency)
+    return [cmd for cmd in catalog if id(cmd) in wanted]
+
+
+def build_graph(commands):
+    """Dependency edges between the commands of one batch
+
+    Returns ``(parents, children)``, two lists indexed by position in
+    ``commands``. A name in ``depends_on`` refers to every command of the
+    batch with that name; names outside the batch are ignored, so running a
+    single command never drags in the rest of the catalog. Raises
+    DependencyError if the dependencies form a cycle.
+    """
+    by_name = {}
+    for index, cmd in enumerate(commands):
+        by_name.setdefault(cmd['name'], []).append(index)
+
+    parents = [[] for _ in commands]
+    children = [[] for _ in commands]
+    for index, cmd in enumerate(commands):
+        for name in dependency_names(cmd):
+            for parent in by_name.get(name, ()):
+                if parent not in parents[index]:
+                    parents[index].append(parent)
+                    children[parent].append(index)
+
+    cycle = find_cycle(children)
+    if cycle:
+        path = " -> ".join(commands[index]['name'] for index in cycle)
+        raise DependencyError(f"Dependency cycle: {path}")
+    return parents, children
+
+
+def find_cycle(children):
+    """One cycle in the graph as a list of node indexes, or None"""
+    WHITE, GREY, BLACK = 0, 1, 2
+    color = [WHITE] * len(children)
+    for root in range(len(children)):
+        if color[root] != WHITE:
+            continue
+        # Iterative DFS so long chains can't hit the recursion limit
+        stack = [(root, iter(children[root]))]
+        path = [root]
+        color[root] = GREY
+        while stack:
+            node, edges = stack[-1]
+            for child in edges:
+                if color[child] == GREY:
+                    return path[path.index(child):] + [child]
+                if color[child] == WHITE:
+                    color[child] = GREY
+                    stack.append((child, iter(children[child])))
+                    path.append(child)
+                    break
+            else:
+                color[node] = BLACK
+                stack.pop()
+                path.pop()
+    return None
+
+
+def chain_lengths(children, weights=None):
+    """Length of the longest chain starting at each node
+
+    Each node counts as ``weights[node]`` (default 1), so with expected run
+    times as weights this is the remaining critical path below each node.
+    """
+    if weights is None:
+        weights = [1] * len(children)
+    lengths = [None] * len(children)
+    visiting = [False] * len(children)
+    for root in range(len(children)):
+        stack = [root]
+        while stack:
+            node = stack[-1]
+            if lengths[node] is not None:
+                stack.pop()
+                continue
+            pending = [child for child in children[node] if lengths[child] is None]
+            if pending and not visiting[node]:
+                visiting[node] = True
+                stack.extend(pending)
+                continue
+            lengths[node] = weights[node] + max((lengths[child] for child in children[node]),
+                                                default=0)
+            stack.pop()
+    return lengths
+
+
+class BatchNode:
+    """One command of a batch and how it ended"""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    SKIPPED = 'skipped'
+
+    def __init__(self, index, cmd):
+        self.index = index
+        self.cmd = cmd
+        self.state = self.PENDING
+        self.start_time = None
+        self.end_time = None
+        # Why a skipped node never ran
+        self.reason = None
+
+    @property
+    def name(self):
+        return self.cmd['name']
+
+    @property
+    def duration(self):
+        if self.start_time is None or self.end_time is None:
+            return 0.0
+        return self.end_time - self.start_time
+
+
+class BatchRun:
+    """Run a batch of commands as a DAG on an ExecutionEngine
+
+    Commands without unfinished dependencies are submitted at once, and each
+    dependent is submitted the moment its last dependency succeeds, so the
+    worker pool is only idle when nothing is runnable. When a command fails,
+    every command that (transitively) depends on it is skipped. Ready
+    commands heading the longest remaining chain start first; chains are
+    measured in ``estimates`` (expected seconds per command, e.g. from the
+    run history) when given, otherwise in number of commands.
+
+    Each command is submitted in its ``group`` (see launcher.policy), whose
+    limits are applied to the scheduler on ``start``. They come from
+    ``limits`` (``{group: GroupLimit}``) if given, so that limits declared
+    anywhere in the catalog count, otherwise from the batch's own commands.
+
+    ``job(cmd)`` returns False on failure, either directly or through the
+    awaitable it returns. ``on_node_done(node)`` and ``on_finished(batch)``
+    are called from the engine thread (or from ``start``/``cancel`` when
+    nothing had to run).
+    """
+
+    def __init__(self, commands, scheduler, job, on_node_done=None, on_finished=None,
+                 estimates=None, limits=None):
+        self.nodes = [BatchNode(index, cmd) for index, cmd in enumerate(commands)]
+        self.parents, self.children = build_graph(commands)
+        self.scheduler = scheduler
+        self.job = job
+        self.on_node_done = on_node_done
+        self.on_finished = on_finished
+        self.limits = group_limits(commands) if limits is None else limits
+
+        self.start_time = None
+        self.end_time = None
+        self._lengths = chain_lengths(self.children, estimates)
+        self._waiting = [len(parents) for parents in self.parents]
+        self._remaining = len(self.nodes)
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def start(self):
+        """Submit every command that has no dependencies"""
+        self.start_time = time.perf_counter()
+        groups = {command_group(node.cmd) for node in self.nodes}
+        for group, limit in self.limits.items():
+            if group in groups:
+                self.scheduler.set_group_limit(group, limit)
+        ready = [node for node in self.nodes if not self._waiting[node.index]]
+        self._submit(ready)
+        if not self.nodes:
+            self._finish()
+
+    def cancel(self):
+        """Skip every command that has not started yet
+
+        Jobs already queued on the scheduler become no-ops; running commands
+        are left to finish (or to be terminated by the caller).
+        """
+        with self._lock:
+            skipped = [node for node in self.nodes if node.state == BatchNode.PENDING]
+            for node in skipped:
+                node.state = BatchNode.SKIPPED
+                node.reason = "cancelled"
+        self._settled(skipped)
+
+    def wait(self, timeout=None):
+        """Block until every command has finished or been skipped"""
+        return self._done.wait(timeout)
+
+    @property
+    def finished(self):
+        return self._done.is_set()
+
+    def counts(self):
+        """How many commands are in each state"""
+        counts = dict.fromkeys((BatchNode.PENDING, BatchNode.RUNNING, BatchNode.SUCCEEDED,
+                                BatchNode.FAILED, BatchNode.SKIPPED), 0)
+        with self._lock:
+            for node in self.nodes:
+                counts[node.state] += 1
+        return counts
+
+    @property
+    def wall_time(self):
+        """Seconds from the first submission to the last command finishing"""
+        if self.start_time is None:
+            return 0.0
+        end = self.end_time if self.end_time is not None else time.perf_counter()
+        return end - self.start_time
+
+    def critical_path(self):
+        """Longest chain of commands by measured run time: ``(seconds, nodes)``
+
+        This is the lower bound on the wall time of the batch however many
+        workers it gets; a wall time far above it means the batch was
+        starved of worker slots.
+        """
+        best = [0.0] * len(self.nodes)
+        via = [None] * len(self.nodes)
+        for index in self._topological_order():
+            parents = self.parents[index]
+            if parents:
+                parent = max(parents, key=lambda p: best[p])
+                best[index] = best[parent]
+                via[index] = parent
+            best[index] += self.nodes[index].duration
+
+        if not self.nodes:
+            return 0.0, []
+        index = max(range(len(self.nodes)), key=lambda i: best[i])
+        total = best[index]
+        path = []
+        while index is not None:
+            path.append(self.nodes[index])
+            index = via[index]
+        path.reverse()
+        return total, path
+
+    def summary(self):
+        """One line describing how the batch went"""
+        counts = self.counts()
+        critical, _ = self.critical_path()
+        parts = [f"{counts[BatchNode.SUCCEEDED]} succeeded", f"{counts[BatchNode.FAILED]} failed"]
+        if counts[BatchNode.SKIPPED]:
+            parts.append(f"{counts[BatchNode.SKIPPED]} skipped")
+        return (f"{', '.join(parts)} - wall time {self.wall_time:.2f}s, "
+                f"critical path {critical:.2f}s")
+
+    def _submit(self, nodes):
+        # Longest remaining chain first; ties keep batch order
+        for node in sorted(nodes, key=lambda n: -self._lengths[n.index]):
+            self.scheduler.submit(self._run, node, priority=-self._lengths[node.index],
+                                  group=command_group(node.cmd))
+
+    def _run(self, node):
+        with self._lock:
+            if node.state != BatchNode.PENDING:
+                # Cancelled while it sat in the queue
+                return None
+            node.state = BatchNode.RUNNING
+            node.start_time = time.perf_counter()
+
+        try:
+            result = self.job(node.cmd)
+        except BaseException:
+            self._ended(node, False)
+            raise
+        if inspect.isawaitable(result):
+            # Asynchronous job: the scheduler awaits this and keeps the slot
+            return self._await_job(node, result)
+        return self._ended(node, result is not False)
+
+    async def _await_job(self, node, awaitable):
+        ok = False
+        try:
+            ok = await awaitable is not False
+        finally:
+            self._ended(node, ok)
+        return ok
+
+    def _ended(self, node, ok):
+        node.end_time = time.perf_counter()
+        self._complete(node, ok)
+        return ok
+
+    def _complete(self, node, ok):
+        ready = []
+        settled = [node]
+        with self._lock:
+            node.state = BatchNode.SUCCEEDED if ok else BatchNode.FAILED
+            if ok:
+                for child in self.children[node.index]:
+                    self._waiting[child] -= 1
+                    if not self._waiting[child] and self.nodes[child].state == BatchNode.PENDING:
+                        ready.append(self.nodes[child])
+            else:
+                settled.extend(self._skip_dependents(node))
+        self._submit(ready)
+        self._settled(settled)
+
+    def _skip_dependents(self, failed):
+        # Caller holds the lock
+        skipped = []
+        stack = list(self.children[failed.index])
+        while stack:
+            node = self.nodes[stack.pop()]
+            if node.state != BatchNode.PENDING:
+                continue
+            node.state = BatchNode.SKIPPED
+            node.reason = f"{failed.name} failed"
+            skipped.append(node)
+            stack.extend(self.children[node.index])
+        return skipped
+
+    def _settled(self, nodes):
+        if not nodes:
+            return
+        for node in nodes:
+            if self.on_node_done:
+                try:
+                    self.on_node_done(node)
+                except Exception as e:
+                    print(f"Batch callback failed: {e}")
+        with self._lock:
+            self._remaining -= len(nodes)
+            last = self._remaining == 0
+        if last:
+            self._finish()
+
+    def _finish(self):
+        self.end_time = time.perf_counter()
+        self._done.set()
+        if self.on_finished:
+            try:
+                self.on_finished(self)
+            except Exception as e:
+                print(f"Batch callback failed: {e}")
+
+    def _topological_order(self):
+        waiting = [len(parents) for parents in self.parents]
+        order = [index for index, count in enumerate(waiting) if not count]
+        for index in order:
+            for child in self.children[index]:
+                waiting[child] -= 1
+                if not waiting[child]:
+                    order.append(child)
+        return order
@@ -0,0 +1,192 @@
+import json
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+from launcher.metrics import export_summaries
+
+
+def format_bytes(value):
+    """Human-readable byte count"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if value < 1024 or unit == 'GB':
+            return f"{value:.0f} {unit}" if unit == 'B' else f"{value:.1f} {unit}"
+        value /= 1024
+
+
+class ResourceDashboard:
+    """Window showing live CPU, memory and I/O of background processes
+
+    The table lists running processes and recently finished ones that were
+    sampled; the graph below plots the CPU% and RSS history of the selected
+    row. Rows are updated in place on each refresh rather than rebuilt.
+    """
+
+    REFRESH_MS = 1000
+    COLUMNS = (
+        ('pid', "PID", 60),
+        ('procs', "Procs", 50),
+        ('cpu', "CPU %", 70),
+        ('rss', "RSS", 80),
+        ('read', "Read/s", 80),
+        ('write', "Write/s", 80),
+        ('peak_cpu', "Peak CPU %", 80),
+        ('peak_rss', "Peak RSS", 80),
+    )
+
+    def __init__(self, parent, tracker, sampler):
+        self.tracker = tracker
+        self.sampler = sampler
+        self.rows = {}
+        self._after_id = None
+
+        self.window = tk.Toplevel(parent)
+        self.window.title("Process Resources")
+        self.window.geometry("800x450")
+        self.window.columnconfigure(0, weight=1)
+        self.window.rowconfigure(1, weight=1)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        # Sampling controls
+        top_frame = ttk.Frame(self.window, padding="5")
+        top_frame.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        top_frame.columnconfigure(2, weight=1)
+        ttk.Label(top_frame, text="Sample every (s):").grid(row=0, column=0, sticky=tk.W)
+        self.interval = tk.DoubleVar(value=sampler.interval)
+        ttk.Spinbox(top_frame, from_=0.2, to=60, increment=0.5, width=6,
+                    textvariable=self.interval,
+                    command=self.apply_interval).grid(row=0, column=1, padx=(5, 0))
+        ttk.Button(top_frame, text="Export...",
+                   command=self.export).grid(row=0, column=3, sticky=tk.E)
+
+        # Process table
+        table_frame = ttk.Frame(self.window, padding=(5, 0, 5, 0))
+        table_frame.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        table_frame.columnconfigure(0, weight=1)
+        table_frame.rowconfigure(0, weight=1)
+        self.table = ttk.Treeview(table_frame, columns=[c[0] for c in self.COLUMNS],
+                                  selectmode='browse')
+        self.table.heading('#0', text="Name")
+        self.table.column('#0', width=160)
+        for column, heading, width in self.COLUMNS:
+            self.table.heading(column, text=heading)
+            self.table.column(column, width=width, anchor=tk.E)
+        v_scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.table.yview)
+        self.table.configure(yscrollcommand=v_scrollbar.set)
+        self.table.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        v_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.table.bind('<<TreeviewSelect>>', lambda e: self.draw_graph())
+
+        # History graph of the selected process
+        self.graph = tk.Canvas(self.window, height=120, background='white')
+        self.graph.grid(row=2, column=0, sticky=(tk.W, tk.E), padx=5, pady=5)
+
+        if not sampler.available:
+            self.graph.create_text(10, 10, anchor=tk.NW, fill='gray',
+                                   text="Resource metrics need /proc (Linux)")
+        self.refresh()
+
+    def show(self):
+        self.window.deiconify()
+        self.window.lift()
+
+    def close(self):
+        if self._after_id is not None:
+            self.window.after_cancel(self._after_id)
+            self._after_id = None
+        self.window.destroy()
+
+    def exists(self):
+        try:
+            return bool(self.window.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def apply_interval(self):
+        try:
+            self.sampler.set_interval(self.interval.get())
+        except (tk.TclError, ValueError):
+            pass
+
+    def sampled_records(self):
+        """Running records plus recently finished ones that have metrics"""
+        records = self.tracker.records() + list(reversed(self.tracker.recent))
+        return [record for record in records if record.metrics is not None]
+
+    def refresh(self):
+        records = {str(id(record)): record for record in self.sampled_records()}
+        for iid in list(self.rows):
+            if iid not in records:
+                self.table.delete(iid)
+                del self.rows[iid]
+        for iid, record in records.items():
+            values = self.row_values(record)
+            if iid in self.rows:
+                if self.rows[iid][1] != values:
+                    self.table.item(iid, values=values)
+            else:
+                self.table.insert('', tk.END, iid=iid, text=record.name, values=values)
+            self.rows[iid] = (record, values)
+
+        self.draw_graph()
+        self._after_id = self.window.after(self.REFRESH_MS, self.refresh)
+
+    @staticmethod
+    def row_values(record):
+        metrics = record.metrics
+        series = metrics.series
+        if record.running:
+            live = (f"{metrics.latest('cpu_percent'):.1f}",
+                    format_bytes(metrics.latest('rss_bytes')),
+                    format_bytes(metrics.latest('read_bytes_per_s')),
+                    format_bytes(metrics.latest('write_bytes_per_s')))
+        else:
+            live = (f"exit {record.returncode}", "", "", "")
+        return ((record.pid, metrics.process_count) + live +
+                (f"{series['cpu_percent'].peak:.1f}", format_bytes(series['rss_bytes'].peak)))
+
+    def draw_graph(self):
+        if not self.sampler.available:
+            return
+        self.graph.delete('all')
+        selection = self.table.selection()
+        if not selection or selection[0] not in self.rows:
+            return
+        metrics = self.rows[selection[0]][0].metrics
+
+        width = max(self.graph.winfo_width(), 100)
+        height = max(self.graph.winfo_height(), 60)
+        self.plot(metrics.series['cpu_percent'].values(), width, height, 'blue')
+        self.plot(metrics.series['rss_bytes'].values(), width, height, 'green')
+        self.graph.create_text(5, 5, anchor=tk.NW, fill='blue',
+                               text=f"CPU % (peak {metrics.series['cpu_percent'].peak:.1f})")
+        self.graph.create_text(5, 20, anchor=tk.NW, fill='green',
+                               text=f"RSS (peak {format_bytes(metrics.series['rss_bytes'].peak)})")
+
+    def plot(self, values, width, height, color):
+        if len(values) < 2:
+            return
+        top = max(values) or 1.0
+        step = width / (len(values) - 1)
+        points = []
+        for index, value in enumerate(values):
+            points.extend((index * step, height - 4 - (height - 8) * value / top))
+        self.graph.create_line(*points, fill=color)
+
+    def export(self):
+        """Write peak and average usage of every sampled run to a JSON file"""
+        rows = export_summaries(self.sampled_records())
+        if not rows:
+            messagebox.showinfo("Export", "No sampled processes to export yet.")
+            return
+        path = filedialog.asksaveasfilename(parent=self.window, defaultextension='.json',
+                                            filetypes=[("JSON files", "*.json")],
+                                            initialfile="process-metrics.json")
+        if not path:
+            return
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(rows, f, indent=2)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to export metrics: {e}")
+            return
+        messagebox.showinfo("Export", f"Exported {len(rows)} run(s) to {path}")
@@ -0,0 +1,543 @@
+import asyncio
+import collections
+import heapq
+import inspect
+import itertools
+import math
+import os
+import subprocess
+import threading
+
+from launcher.output import OutputCapture, log_file_name
+from launcher.policy import RATE_WINDOW, GroupLimit, RunPolicy
+from launcher.runner import background_options
+from launcher.shellpool import ShellPool, accepts, supported
+from launcher.shutdown import signal_tree
+
+
+def default_max_workers():
+    """Default concurrency limit: one slot per CPU, at least two"""
+    return max(2, os.cpu_count() or 1)
+
+
+class _Group:
+    """Scheduler state of one limit group: its limit, usage and parked jobs"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.running = 0
+        # Loop times of the starts within the last RATE_WINDOW seconds
+        self.starts = collections.deque()
+        # Jobs that were due while the group was full, in heap order
+        self.parked = []
+        self.wakeup = None
+
+    def ready_at(self, now):
+        """None if a job of the group may start now, else when it may
+
+        ``math.inf`` means "once a running job of the group finishes".
+        """
+        if self.limit.concurrency is not None and self.running >= self.limit.concurrency:
+            return math.inf
+        if self.limit.per_minute is not None:
+            while self.starts and self.starts[0] <= now - RATE_WINDOW:
+                self.starts.popleft()
+            if len(self.starts) >= self.limit.per_minute:
+                return self.starts[0] + RATE_WINDOW
+        return None
+
+
+class ExecutionEngine:
+    """Run background commands on one asyncio event loop in a dedicated thread
+
+    The loop owns the whole life of a background command: it spawns the
+    shell, waits for it to exit, reads its output and enforces its timeout.
+    Waiting and reading are readiness callbacks on the loop (pidfds and pipe
+    fds where the platform has them), so a thousand running commands cost a
+    few thousand fds rather than a thousand threads. Commands are spawned
+    with a plain Popen rather than asyncio's subprocess transports, which
+    cost about half a millisecond more per launch and, before Python 3.12,
+    a watcher thread per child.
+
+    The engine doubles as the job scheduler used by BatchRun: ``submit``
+    queues a job by priority (lower first, then submission order) and at
+    most ``max_workers`` jobs run at once. A job may be a plain function,
+    which runs on the loop thread and must not block, or return an
+    awaitable, which keeps its slot until it completes. Blocking work
+    (hashing files, launching terminal windows) goes through ``call``.
+    ``on_change`` is called on the loop thread whenever the counts change.
+
+    Every deadline - command timeouts, the grace period before SIGKILL,
+    retry backoff and group rate limits - is an entry in the loop's own
+    timer heap, so thousands of pending deadlines cost a heap entry each
+    and no threads. Jobs submitted with a ``group`` also obey the limits
+    set with ``set_group_limit``: a job whose group is full is parked
+    with its group, and the next free slot goes to the best job that may
+    actually start.
+
+    With ``warm_shells``, that many shells are kept spawned and waiting
+    (see launcher.shellpool); captured commands start in one of them when
+    one is idle, which takes the shell's fork+exec off the launch path.
+    """
+
+    READ_SIZE = 65536
+    # Seconds between SIGTERM and SIGKILL for a command that timed out
+    KILL_GRACE = 3.0
+
+    def __init__(self, tracker, max_workers=None, on_change=None, warm_shells=0):
+        self.tracker = tracker
+        if max_workers is None:
+            max_workers = default_max_workers()
+        self.max_workers = max(1, int(max_workers))
+        self.on_change = on_change
+        self.shells = ShellPool(warm_shells) if warm_shells and supported() else None
+
+        self._heap = []
+        self._seq = itertools.count()
+        self._groups = {}
+        # Futures of retries waiting out their backoff
+        self._backoffs = set()
+        # Bumped by cancel_pending, so runs that were going when the user
+        # cancelled (and are then terminated) are not retried
+        self._generation = 0
+
+        # Counters exposed to the UI; only the loop thread changes them
+        self.queued = 0
+        self.running = 0
+        self.done = 0
+        self.failed = 0
+        self.retried = 0
+        self.timed_out = 0
+
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="launcher-engine")
+        self._thread.daemon = True
+        self._thread.start()
+
+    # Scheduler interface
+
+    def submit(self, func, *args, priority=0, group=None):
+        """Queue a job; it starts as soon as a slot is free. Safe from any thread
+
+        A job with a ``group`` also waits for its group's limits.
+        """
+        self._on_loop(self._push, (priority, next(self._seq), func, args, group))
+
+    def set_group_limit(self, group, limit):
+        """Apply a policy.GroupLimit to a group's jobs, or lift it with None"""
+        self._on_loop(self._set_group_limit, group, limit)
+
+    def set_max_workers(self, max_workers):
+        """Change the concurrency limit; running jobs are never interrupted"""
+        self.max_workers = max(1, int(max_workers))
+        self._on_loop(self._dispatch)
+
+    def cancel_pending(self):
+        """Drop every job that has not started yet and return how many"""
+        if threading.current_thread() is self._thread:
+            return self._drop_queued()
+        return asyncio.run_coroutine_threadsafe(self._cancel(), self.loop).result()
+
+    def counts(self):
+        """Snapshot of the job counters, plus retries and timeouts of commands"""
+        return {
+            'queued': self.queued,
+            'running': self.running,
+            'done': self.done,
+            'failed': self.failed,
+            'retried': self.retried,
+            'timed_out': self.timed_out,
+        }
+
+    def is_busy(self):
+        """Whether any job is queued or running"""
+        return self.queued > 0 or self.running > 0
+
+    # Process API (coroutines, run on the loop)
+
+    async def run_command(self, cmd, capture=True, log_dir=None, timeout=None, output=None,
+                          on_start=None):
+        """Start a saved command in the background and wait for it to exit
+
+        With ``capture`` its output (stdout and stderr, interleaved) goes
+        into an OutputCapture, spilled to ``log_dir`` if given, or into
+        ``output`` (any object with OutputCapture's ``write``,
+        ``stream_closed`` and ``open_streams``); otherwise it inherits ours.
+        After ``timeout`` seconds the command's process group gets SIGTERM,
+        then SIGKILL. ``on_start(record)`` is called once the command is
+        running. Returns the TrackedProcess; its output may still be
+        draining if children of the command hold the pipe open.
+        """
+        process, read_fd = self._spawn(cmd['command'], capture)
+        if capture and output is None:
+            log_path = None
+            if log_dir is not None:
+                log_path = log_dir / log_file_name(cmd['name'], process.pid)
+            output = OutputCapture(log_path=log_path)
+        elif not capture:
+            output = None
+        record = self.tracker.adopt(process, cmd['name'], cmd['command'], output,
+                                    cmd_id=cmd.get('id'))
+        if on_start:
+            on_start(record)
+        if capture:
+            self.loop.create_task(self._drain(read_fd, output))
+        return await self._wait(process, record, timeout)
+
+    async def run_with_policy(self, cmd, capture=True, log_dir=None, on_retry=None,
+                              executor=None):
+        """``run_command`` under the command's own timeout and retries
+
+        See launcher.policy for the fields. Before each retry,
+        ``on_retry(record, attempt, delay)`` is called on the loop thread
+        with the failed run. Returns the record of the last run;
+        ``cancel_pending`` abandons retries still waiting out their backoff,
+        and runs in progress when it was called, or stopped by a shutdown,
+        are never retried.
+
+        ``executor`` is the backend the command runs on: any object with a
+        coroutine ``run(cmd, capture, log_dir, timeout)`` returning a
+        finished record, such as a remote.AgentPool. By default commands
+        run here, through ``run_command``.
+        """
+        run = executor.run if executor is not None else self.run_command
+        policy = RunPolicy.of(cmd)
+        attempt = 0
+        while True:
+            generation = self._generation
+            record = await run(cmd, capture, log_dir, timeout=policy.timeout)
+            if record.returncode == 0 or attempt >= policy.retries:
+                return record
+            if generation != self._generation or record.shutdown_seconds is not None:
+                # Terminated by the user, not failed on its own
+                return record
+            attempt += 1
+            delay = policy.delay(attempt)
+            if on_retry:
+                on_retry(record, attempt, delay)
+            if not await self._backoff(delay):
+                return record
+            self.retried += 1
+            self._notify()
+
+    def _spawn(self, command, capture):
+        """Start a command, in a warm shell if one is idle; returns (Popen, output fd)"""
+        if capture and self.shells is not None and accepts(command):
+            shell = self.shells.take()
+            # Replace the shell once this launch is under way
+            self.loop.call_soon(self.shells.fill)
+            if shell is not None:
+                try:
+                    return shell.run(command), shell.read_fd
+                except OSError:
+                    shell.discard()
+
+        streams = {}
+        read_fd = None
+        if capture:
+            read_fd, write_fd = os.pipe()
+            streams = {'stdout': write_fd, 'stderr': write_fd}
+        try:
+            process = subprocess.Popen(command, shell=True, stdin=subprocess.DEVNULL,
+                                       **streams, **background_options())
+        except BaseException:
+            if capture:
+                os.close(read_fd)
+            raise
+        finally:
+            if capture:
+                # Only the child writes; the pipe hits EOF once every writer has exited
+                os.close(write_fd)
+        return process, read_fd
+
+    async def _wait(self, process, record, timeout):
+        exited = self._exit_future(process)
+        deadline = None
+        if timeout:
+            deadline = self.loop.call_later(timeout, self._expire, exited, record)
+        returncode = await exited
+        if deadline is not None:
+            deadline.cancel()
+        self.tracker.finish(record, returncode)
+        return record
+
+    def _expire(self, exited, record):
+        if exited.done():
+            return
+        record.timed_out = True
+        self.timed_out += 1
+        self._notify()
+        signal_tree(record)
+        self.loop.call_later(self.KILL_GRACE, self._kill, exited, record)
+
+    def _kill(self, exited, record):
+        if not exited.done():
+            signal_tree(record, force=True)
+            record.force_killed = True
+
+    async def _backoff(self, delay):
+        """Sleep before a retry; False if cancel_pending called it off"""
+        wake = self.loop.create_future()
+        timer = self.loop.call_later(delay, _resolve, wake, True)
+        self._backoffs.add(wake)
+        try:
+            return await wake
+        finally:
+            timer.cancel()
+            self._backoffs.discard(wake)
+
+    async def call(self, func, *args):
+        """Run a blocking function on the default thread pool and await its result"""
+        return await self.loop.run_in_executor(None, func, *args)
+
+    def defer(self, func, *args):
+        """Run a blocking function on the thread pool without waiting; safe from any thread"""
+        self._on_loop(self.loop.run_in_executor, None, func, *args)
+
+    def run_coroutine(self, coroutine):
+        """Schedule a coroutine on the loop from another thread; returns a Future"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def close(self):
+        """Stop the loop; jobs still queued or running are abandoned"""
+        if self.shells is not None:
+            self._on_loop(self.shells.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+
+    # Internals
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        if self.shells is not None:
+            self.loop.call_soon(self.shells.fill)
+        self.loop.run_forever()
+
+    def _on_loop(self, func, *args):
+        if threading.current_thread() is self._thread:
+            func(*args)
+        else:
+            self.loop.call_soon_threadsafe(func, *args)
+
+    def _push(self, item):
+        heapq.heappush(self._heap, item)
+        self.queued += 1
+        self._notify()
+        self._dispatch()
+
+    def _set_group_limit(self, name, limit):
+        group = self._groups.get(name)
+        if group is None:
+            if limit:
+                self._groups[name] = _Group(limit)
+            return
+        # Keep the group while its jobs run so their slots are still released
+        group.limit = limit or GroupLimit()
+        self._unpark(group, len(group.parked))
+
+    def _dispatch(self):
+        now = self.loop.time()
+        while self._heap and self.running < self.max_workers:
+            item = heapq.heappop(self._heap)
+            priority, _, func, args, name = item
+            group = self._groups.get(name) if name is not None else None
+            if group is not None:
+                ready_at = group.ready_at(now)
+                if ready_at is not None:
+                    # Wait with the group; the slot goes to the next job in line
+                    heapq.heappush(group.parked, item)
+                    if ready_at != math.inf:
+                        self._wake_group(group, ready_at)
+                    continue
+                group.running += 1
+                if group.limit.per_minute is not None:
+                    group.starts.append(now)
+                if group.parked:
+                    self._release_next(group, now)
+            self.queued -= 1
+            self.running += 1
+            self._notify()
+            self.loop.create_task(self._run_job(func, args, group))
+
+    def _wake_group(self, group, when):
+        if group.wakeup is not None and group.wakeup.when() <= when:
+            return
+        if group.wakeup is not None:
+            group.wakeup.cancel()
+        group.wakeup = self.loop.call_at(when, self._group_ready, group)
+
+    def _release_next(self, group, now):
+        """Queue the group's best parked job again if it may start, or time its release"""
+        ready_at = group.ready_at(now)
+        if ready_at is None:
+            heapq.heappush(self._heap, heapq.heappop(group.parked))
+        elif ready_at != math.inf:
+            self._wake_group(group, ready_at)
+
+    def _group_ready(self, group):
+        group.wakeup = None
+        self._unpark(group, 1)
+
+    def _unpark(self, group, count):
+        """Move a group's best parked jobs back into the main queue"""
+        moved = False
+        while group.parked and count > 0:
+            heapq.heappush(self._heap, heapq.heappop(group.parked))
+            count -= 1
+            moved = True
+        if moved:
+            self._dispatch()
+
+    async def _run_job(self, func, args, group=None):
+        ok = True
+        try:
+            result = func(*args)
+            if inspect.isawaitable(result):
+                result = await result
+            ok = result is not False
+        except Exception as e:
+            ok = False
+            print(f"Scheduled job failed: {e}")
+
+        self.running -= 1
+        self.done += 1
+        if not ok:
+            self.failed += 1
+        self._notify()
+        if group is not None:
+            group.running -= 1
+            self._unpark(group, 1)
+        self._dispatch()
+
+    async def _cancel(self):
+        return self._drop_queued()
+
+    def _drop_queued(self):
+        self._generation += 1
+        cancelled = len(self._heap)
+        self._heap = []
+        for group in self._groups.values():
+            cancelled += len(group.parked)
+            group.parked = []
+            if group.wakeup is not None:
+                group.wakeup.cancel()
+                group.wakeup = None
+        self.queued -= cancelled
+        for wake in self._backoffs:
+            _resolve(wake, False)
+        if cancelled:
+            self._notify()
+        return cancelled
+
+    async def _drain(self, fd, output):
+        output.open_streams += 1
+        if os.name == 'nt':
+            # Windows event loops can't watch anonymous pipes; block in the thread pool
+            await self.call(self._read_blocking, fd, output)
+            return
+
+        done = self.loop.create_future()
+
+        def readable():
+            try:
+                data = os.read(fd, self.READ_SIZE)
+            except BlockingIOError:
+                return
+            except OSError:
+                data = b''
+            if data:
+                pending = output.write(data)
+                if pending is not None:
+                    # The sink is full: stop reading until it has room again
+                    self.loop.remove_reader(fd)
+                    asyncio.ensure_future(pending).add_done_callback(resume)
+                return
+            self.loop.remove_reader(fd)
+            done.set_result(None)
+
+        def resume(task):
+            if not task.cancelled():
+                # A failed drain means the data is going nowhere; keep reading anyway
+                task.exception()
+            if not done.done():
+                self.loop.add_reader(fd, readable)
+
+        os.set_blocking(fd, False)
+        self.loop.add_reader(fd, readable)
+        try:
+            await done
+        finally:
+            if not done.done():
+                # Cancelled; a paused reader must not be re-added to the closed fd
+                self.loop.remove_reader(fd)
+                done.cancel()
+            os.close(fd)
+            output.stream_closed()
+
+    def _read_blocking(self, fd, output):
+        try:
+            while True:
+                data = os.read(fd, self.READ_SIZE)
+                if not data:
+                    break
+                pending = output.write(data)
+                if pending is not None:
+                    asyncio.run_coroutine_threadsafe(_wait_for(pending), self.loop).result()
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+            output.stream_closed()
+
+    def _exit_future(self, process):
+        """Future resolved with the process's exit code
+
+        A pidfd becomes readable when the process exits, so on Linux the
+        loop itself notices the exit; elsewhere a small thread blocks in
+        ``wait()`` (not the shared pool, which a thousand waits would fill).
+        """
+        exited = self.loop.create_future()
+        pidfd = None
+        if hasattr(os, 'pidfd_open'):
+            try:
+                pidfd = os.pidfd_open(process.pid)
+            except OSError:
+                pass
+
+        if pidfd is None:
+            def wait():
+                returncode = process.wait()
+                self.loop.call_soon_threadsafe(exited.set_result, returncode)
+
+            thread = threading.Thread(target=wait, name=f"launcher-wait-{process.pid}")
+            thread.daemon = True
+            thread.start()
+            return exited
+
+        def ready():
+            self.loop.remove_reader(pidfd)
+            os.close(pidfd)
+            exited.set_result(process.wait())
+
+        self.loop.add_reader(pidfd, ready)
+        return exited
+
+    def _notify(self):
+        if self.on_change:
+            try:
+                self.on_change()
+            except Exception:
+                pass
+
+
+def _resolve(future, result):
+    if not future.done():
+        future.set_result(result)
+
+
+async def _wait_for(awaitable):
+    try:
+        await awaitable
+    except Exception:
+        # A failed drain means the data is going nowhere; keep reading anyway
+        pass
@@ -0,0 +1,928 @@
+import collections
+import queue
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk, messagebox, simpledialog
+
+from launcher.cache import ResultCache
+from launcher.commandlist import CommandListView
+from launcher.dag import BatchRun, DependencyError, dependency_names
+from launcher.dashboard import ResourceDashboard
+from launcher.engine import ExecutionEngine, default_max_workers
+from launcher.history import open_history
+from launcher.metrics import ResourceSampler
+from launcher.model import CommandModel
+from launcher.outputview import OutputViewer
+from launcher.policy import group_limits
+from launcher.remote import AgentPool, agent_addresses, agent_token
+from launcher.search import CommandIndex, command_tokens, tokenize
+from launcher.runner import find_terminal, launch_command
+from launcher.shutdown import (describe_shutdown, group_exists, live_groups,
+                               shutdown_processes, signal_tree, tree_alive)
+from launcher.tracker import ProcessTracker
+from launcher.uibus import UpdateBus
+from launcher.storage import CommandStore, default_data_dir, replay_into_model
+
+class CommandLauncher:
+    # How often the Tk thread picks up batches from the loader thread
+    LOAD_POLL_MS = 15
+    # Frame interval for applying updates posted by other threads
+    UI_FRAME_MS = 50
+    # Most rows a filter shows; broad one-letter queries would match most of the catalog
+    FILTER_LIMIT = 1000
+    # Events handled per frame; a larger backlog spills into the next frame
+    MAX_EVENTS_PER_FRAME = 20000
+    # Seconds "Terminate All" waits for process groups before SIGKILL
+    SHUTDOWN_TIMEOUT = 3.0
+    # Idle shells kept ready so background commands start without a fork+exec
+    WARM_SHELLS = 4
+    
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Command Launcher v1.0.0")
+        self.root.geometry("800x600")
+        self.root.minsize(600, 400)
+        
+        # Data file path (same directory as executable)
+        self.data_dir = default_data_dir()
+        
+        self.data_file = self.data_dir / "commands.json"
+        
+        # Snapshot plus journal; edits are appended instead of rewriting the file
+        self.store = CommandStore(self.data_file)
+        
+        # Commands storage, keyed by stable id
+        self.model = CommandModel()
+        self.store.source = self.model.to_list
+        
+        # Search index over names and command text, filled as commands load
+        self.index = CommandIndex()
+        
+        # Track running processes for termination; exits are reported as they happen
+        self.tracker = ProcessTracker(on_exit=self.on_process_exit)
+        # Finished commands that left children running in their process group
+        self.lingering = collections.deque(maxlen=self.tracker.recent.maxlen)
+        
+        # Timing of past runs; feeds the Timing column and longest-first ordering
+        self.history = open_history(self.data_dir / "history.db")
+        
+        # Input fingerprints of cached commands' last successful runs
+        self.result_cache = ResultCache(self.data_dir / "result-cache.json")
+        
+        # Background execution setting
+        self.run_in_background = tk.BooleanVar(value=False)
+        
+        # Captured output of background processes can also go to log files
+        self.save_output_logs = tk.BooleanVar(value=False)
+        self.logs_dir = self.data_dir / "logs"
+        self.output_viewer = None
+        
+        # CPU, memory and I/O sampling of background processes
+        self.sampler = ResourceSampler(self.tracker)
+        self.tracker.on_start = self.sampler.process_started
+        self.sampler.start()
+        self.dashboard = None
+        
+        # Dependency-ordered batches still in flight
+        self.batches = set()
+        
+        # Updates from other threads, applied once per frame; only the Tk
+        # thread touches widgets
+        self.updates = UpdateBus()
+        # Engine counters when the current burst of runs began, and the
+        # summary of the last finished batch
+        self.burst_base = None
+        self.batch_report = None
+        
+        # Event loop thread that launches, waits on and captures commands
+        self.max_parallel = tk.IntVar(value=default_max_workers())
+        self.engine = ExecutionEngine(self.tracker, max_workers=self.max_parallel.get(),
+                                      on_change=self.on_engine_change,
+                                      warm_shells=self.WARM_SHELLS)
+        # Find the terminal emulator now rather than on the first terminal launch
+        self.engine.defer(find_terminal)
+        
+        # Background commands run on agents instead when LAUNCHER_AGENTS names any
+        self.agents = None
+        self.connect_agents(agent_addresses())
+        
+        # Create GUI
+        self.create_widgets()
+        self.root.after(self.UI_FRAME_MS, self.apply_updates)
+        
+        # Load saved commands in the background so the window shows immediately
+        self.loading = False
+        self.load_commands()
+        
+        # Bind events
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+    
+    def create_widgets(self):
+        # Main frame
+        main_frame = ttk.Frame(self.root, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        # Configure grid weights
+        self.root.columnconfigure(0, weight=1)
+        self.root.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(1, weight=1)
+        main_frame.rowconfigure(1, weight=1)
+        
+        # Title and version frame
+        title_frame = ttk.Frame(main_frame)
+        title_frame.grid(row=0, column=0, columnspan=3, pady=(0, 10), sticky=(tk.W, tk.E))
+        title_frame.columnconfigure(0, weight=1)
+        
+        # Title
+        title_label = ttk.Label(title_frame, text="Command Launcher", 
+                               font=('Arial', 16, 'bold'))
+        title_label.grid(row=0, column=0, sticky=tk.W)
+        
+        # Version label in corner
+        version_label = ttk.Label(title_frame, text="v1.0.0", 
+                                 font=('Arial', 10), foreground='gray')
+        version_label.grid(row=0, column=1, sticky=tk.E, padx=(0, 10))
+        
+        # Commands list frame
+        list_frame = ttk.LabelFrame(main_frame, text="Saved Commands", padding="5")
+        list_frame.grid(row=1, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
+        list_frame.columnconfigure(0, weight=1)
+        list_frame.rowconfigure(1, weight=1)
+        
+        # Filter box; narrows the list as you type
+        filter_frame = ttk.Frame(list_frame)
+        filter_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 5))
+        filter_frame.columnconfigure(1, weight=1)
+        
+        ttk.Label(filter_frame, text="Filter:").grid(row=0, column=0, sticky=tk.W)
+        self.filter_var = tk.StringVar()
+        filter_entry = ttk.Entry(filter_frame, textvariable=self.filter_var)
+        filter_entry.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(5, 0))
+        filter_entry.bind('<Escape>', lambda e: self.filter_var.set(""))
+        self.filter_var.trace_add('write', lambda *args: self.apply_filter())
+        
+        # Command list; switches to a virtual window for large catalogs
+        tree_frame = ttk.Frame(list_frame)
+        tree_frame.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        tree_frame.columnconfigure(0, weight=1)
+        tree_frame.rowconfigure(0, weight=1)
+        self.command_list = CommandListView(tree_frame, self.model, timing=self.command_timing)
+        self.tree = self.command_list.tree
+        
+        # Command management buttons frame
+        mgmt_frame = ttk.LabelFrame(main_frame, text="Manage Commands", padding="5")
+        mgmt_frame.grid(row=2, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        # Management buttons
+        ttk.Button(mgmt_frame, text="Add Command", command=self.add_command, 
+                  width=15).grid(row=0, column=0, padx=(0, 5))
+        ttk.Button(mgmt_frame, text="Edit Command", command=self.edit_command, 
+                  width=15).grid(row=0, column=1, padx=5)
+        ttk.Button(mgmt_frame, text="Delete Command", command=self.delete_command, 
+                  width=15).grid(row=0, column=2, padx=5)
+        ttk.Button(mgmt_frame, text="Duplicate Command", command=self.duplicate_command, 
+                  width=15).grid(row=0, column=3, padx=(5, 0))
+        
+        # Execution buttons frame
+        exec_frame = ttk.LabelFrame(main_frame, text="Execute Commands", padding="5")
+        exec_frame.grid(row=3, column=0, columnspan=3, sticky=(tk.W, tk.E))
+        
+        # Execution buttons
+        ttk.Button(exec_frame, text="Run Selected", command=self.run_selected, 
+                  width=15, style='Accent.TButton').grid(row=0, column=0, padx=(0, 5))
+        ttk.Button(exec_frame, text="Run All", command=self.run_all, 
+                  width=15, style='Accent.TButton').grid(row=0, column=1, padx=5)
+        ttk.Button(exec_frame, text="Terminate All", command=self.terminate_all, 
+                  width=15, style='Danger.TButton').grid(row=0, column=2, padx=5)
+        ttk.Button(exec_frame, text="View Output", command=self.show_output, 
+                  width=15).grid(row=0, column=3, padx=5)
+        ttk.Button(exec_frame, text="Resources", command=self.show_dashboard, 
+                  width=15).grid(row=0, column=4, padx=5)
+        
+        # Background execution checkbox
+        background_frame = ttk.Frame(exec_frame)
+        background_frame.grid(row=0, column=5, padx=(20, 0), sticky=(tk.W, tk.E))
+        exec_frame.columnconfigure(5, weight=1)
+        
+        ttk.Checkbutton(background_frame, text="Run in Background", 
+                       variable=self.run_in_background).grid(row=0, column=0, sticky=tk.W)
+        
+        # Concurrency limit for the worker pool
+        parallel_frame = ttk.Frame(background_frame)
+        parallel_frame.grid(row=0, column=1, sticky=tk.W, padx=(20, 0))
+        ttk.Label(parallel_frame, text="Max parallel:").grid(row=0, column=0, sticky=tk.W)
+        ttk.Spinbox(parallel_frame, from_=1, to=256, width=5, textvariable=self.max_parallel,
+                   command=self.apply_max_parallel).grid(row=0, column=1, padx=(5, 0))
+        
+        # Help text for background mode
+        help_text = "When checked, commands run silently in background (can be terminated with 'Terminate All')"
+        ttk.Label(background_frame, text=help_text, font=('Arial', 8), 
+                 foreground='gray').grid(row=1, column=0, columnspan=2, sticky=tk.W, pady=(2, 0))
+        
+        # Optional spill of captured output to rotating log files
+        ttk.Checkbutton(background_frame, text="Save output logs", 
+                       variable=self.save_output_logs).grid(row=2, column=0, sticky=tk.W, pady=(2, 0))
+        
+        # Status frame
+        status_frame = ttk.Frame(exec_frame)
+        status_frame.grid(row=1, column=0, columnspan=6, sticky=(tk.W, tk.E), pady=(10, 0))
+        
+        ttk.Label(status_frame, text="Status:").grid(row=0, column=0, sticky=tk.W)
+        self.status_label = ttk.Label(status_frame, text="Ready", foreground="green")
+        self.status_label.grid(row=0, column=1, sticky=tk.W, padx=(5, 0))
+    
+    def load_commands(self):
+        """Start loading commands; rows appear in batches as they are parsed"""
+        self.loading = True
+        self.model.load([])
+        self.index = CommandIndex()
+        self.refresh_tree()
+        self.update_status("Loading commands...")
+        
+        self.load_queue = queue.Queue()
+        thread = threading.Thread(target=self.load_worker, name="launcher-loader")
+        thread.daemon = True
+        thread.start()
+        self.root.after(self.LOAD_POLL_MS, self.drain_loaded)
+    
+    def load_worker(self):
+        """Loader thread: parse the snapshot and hand batches to the Tk thread"""
+        try:
+            loaded = []
+            for batch in self.store.iter_snapshot():
+                loaded.extend(batch)
+                # Tokenizing is most of the indexing work; keep it off the Tk thread
+                tokens = [command_tokens(cmd) for cmd in batch]
+                self.load_queue.put(('batch', (batch, tokens)))
+            if loaded and not self.store.snapshot_from_cache:
+                # Warm starts can then skip JSON parsing
+                self.store.write_cache(loaded)
+            self.load_queue.put(('ops', self.store.read_journals()))
+        except Exception as e:
+            self.load_queue.put(('error', e))
+        self.load_queue.put(('done', None))
+    
+    def drain_loaded(self):
+        """Add loaded batches to the model and the list, a few per tick"""
+        deadline = time.monotonic() + 0.03
+        while time.monotonic() < deadline:
+            try:
+                kind, payload = self.load_queue.get_nowait()
+            except queue.Empty:
+                break
+            
+            if kind == 'batch':
+                batch, tokens = payload
+                # Commands without a saved id wait until every saved id is known
+                ids = self.model.extend(batch, defer=True)
+                by_command = {id(cmd): cmd_tokens for cmd, cmd_tokens in zip(batch, tokens)}
+                self.index.extend((cmd_id, by_command[id(self.model.get(cmd_id))])
+                                  for cmd_id in ids)
+                if self.filter_active():
+                    self.apply_filter()
+                else:
+                    self.command_list.insert_rows(ids)
+            elif kind == 'ops':
+                # Edits journaled by an earlier session
+                touched = replay_into_model(self.model, payload)
+                if touched:
+                    self.index_changed(touched)
+                    self.refresh_tree()
+            elif kind == 'error':
+                messagebox.showerror("Error", f"Failed to load commands: {str(payload)}")
+                self.model.load([])
+                self.index = CommandIndex()
+                self.refresh_tree()
+            elif kind == 'done':
+                self.finish_loading()
+                return
+        
+        self.root.after(self.LOAD_POLL_MS, self.drain_loaded)
+    
+    def finish_loading(self):
+        """Called once the whole catalog is in the model"""
+        self.loading = False
+        self.model.reserve_ids(self.store.next_id)
+        assigned = self.model.assign_deferred()
+        if assigned:
+            self.index_changed(assigned)
+            self.refresh_tree()
+        if self.model.assigned:
+            # Journal entries refer to ids, so persist newly assigned ones first
+            self.save_commands()
+        self.update_status(f"Loaded {len(self.model)} command(s)")
+    
+    def commands_loading(self):
+        """Warn and return True while the catalog is still loading"""
+        if self.loading:
+            messagebox.showwarning("Warning", "Please wait until all commands have loaded.")
+            return True
+        return False
+    
+    def save_commands(self):
+        """Fold the edit journal into a fresh commands.json"""
+        try:
+            self.store.compact(background=False)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save commands: {str(e)}")
+    
+    def record_change(self, record, *args):
+        """Append one edit to the journal"""
+        try:
+            record(*args)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save commands: {str(e)}")
+    
+    def refresh_tree(self):
+        """Bring the command list in line with the model and the current filter"""
+        self.apply_filter()
+    
+    def filter_active(self):
+        """Whether the filter box currently narrows the list
+        
+        A query without any word (e.g. "-" or "&&") matches everything.
+        """
+        return bool(tokenize(self.filter_var.get()))
+    
+    def apply_filter(self):
+        """Show only the commands matching the filter box"""
+        if not self.filter_active():
+            self.command_list.reload()
+            return
+        
+        matches = self.index.search(self.filter_var.get())
+        if len(matches) > self.FILTER_LIMIT:
+            # Ordering every match of a broad query costs more than a keystroke may
+            self.command_list.reload(self.model.ordered(matches, self.FILTER_LIMIT))
+            self.update_status(f"Showing the first {self.FILTER_LIMIT} of {len(matches)} "
+                               f"matching command(s); type more to narrow")
+            return
+        self.command_list.reload(self.model.ordered(matches))
+        self.update_status(f"Showing {len(matches)} of {len(self.model)} command(s)")
+    
+    def index_changed(self, cmd_ids):
+        """Keep the search index and a filtered list in step with edited commands"""
+        for cmd_id in cmd_ids:
+            if cmd_id in self.model:
+                self.index.update(self.model.get(cmd_id))
+            else:
+                self.index.remove(cmd_id)
+        return self.filter_active()
+    
+    def selected_ids(self):
+        """Ids of the selected commands, in display order"""
+        return self.command_list.selection()
+    
+    def add_command(self):
+        """Add a new command"""
+        if self.commands_loading():
+            return
+        
+        dialog = CommandDialog(self.root, "Add Command")
+        if dialog.result:
+            name, command, depends_on = dialog.result
+            cmd = {'name': name, 'command': command}
+            if depends_on:
+                cmd['depends_on'] = depends_on
+            cmd = self.model.add(cmd)
+            self.record_change(self.store.record_add, cmd)
+            if self.index_changed([cmd['id']]):
+                self.apply_filter()
+            else:
+                self.command_list.insert_rows([cmd['id']])
+            self.update_status(f"Added command: {name}")
+    
+    def edit_command(self):
+        """Edit selected command"""
+        if self.commands_loading():
+            return
+        
+        selection = self.selected_ids()
+        if not selection:
+            messagebox.showwarning("Warning", "Please select a command to edit.")
+            return
+        
+        if len(selection) > 1:
+            messagebox.showwarning("Warning", "Please select only one command to edit.")
+            return
+        
+        cmd_id = selection[0]
+        cmd = self.model.get(cmd_id)
+        
+        dialog = CommandDialog(self.root, "Edit Command", cmd['name'], cmd['command'],
+                               dependency_names(cmd))
+        if dialog.result:
+            name, command, depends_on = dialog.result
+            fields = {'name': name, 'command': command}
+            if depends_on or 'depends_on' in cmd:
+                fields['depends_on'] = depends_on
+            self.model.update(cmd_id, **fields)
+            self.record_change(self.store.record_update, cmd_id, fields)
+            if self.index_changed([cmd_id]):
+                self.apply_filter()
+            else:
+                self.command_list.update_rows([cmd_id])
+            self.update_status(f"Updated command: {name}")
+    
+    def delete_command(self):
+        """Delete selected commands"""
+        if self.commands_loading():
+            return
+        
+        selection = self.selected_ids()
+        if not selection:
+            messagebox.showwarning("Warning", "Please select command(s) to delete.")
+            return
+        
+        if len(selection) == 1:
+            message = f"Delete command '{self.model.get(selection[0])['name']}'?"
+        else:
+            message = f"Delete {len(selection)} selected commands?"
+        
+        if messagebox.askyesno("Confirm Delete", message):
+            self.model.remove(selection)
+            self.record_change(self.store.record_remove, selection)
+            self.index_changed(selection)
+            self.command_list.remove_rows(selection)
+            self.update_status(f"Deleted {len(selection)} command(s)")
+    
+    def duplicate_command(self):
+        """Duplicate selected command"""
+        if self.commands_loading():
+            return
+        
+        selection = self.selected_ids()
+        if not selection:
+            messagebox.showwarning("Warning", "Please select a command to duplicate.")
+            return
+        
+        if len(selection) > 1:
+            messagebox.showwarning("Warning", "Please select only one command to duplicate.")
+            return
+        
+        cmd = self.model.get(selection[0]).copy()
+        cmd['name'] = f"{cmd['name']} (Copy)"
+        
+        cmd = self.model.add(cmd)
+        self.record_change(self.store.record_add, cmd)
+        if self.index_changed([cmd['id']]):
+            self.apply_filter()
+        else:
+            self.command_list.insert_rows([cmd['id']])
+        self.update_status(f"Duplicated command: {cmd['name']}")
+    
+    def run_selected(self):
+        """Run selected commands"""
+        selection = self.selected_ids()
+        if not selection:
+            messagebox.showwarning("Warning", "Please select command(s) to run.")
+            return
+        
+        commands_to_run = [self.model.get(cmd_id) for cmd_id in selection]
+        self.execute_commands(commands_to_run)
+    
+    def run_all(self):
+        """Run all commands"""
+        if self.commands_loading():
+            return
+        
+        if not self.model:
+            messagebox.showwarning("Warning", "No commands to run.")
+            return
+        
+        self.execute_commands(self.model.to_list())
+    
+    def execute_commands(self, commands_to_run):
+        """Queue commands on the bounded worker pool, honouring depends_on"""
+        if not commands_to_run:
+            return
+        
+        self.apply_max_parallel()
+        background = self.run_in_background.get()
+        save_logs = self.save_output_logs.get()
+        
+        def job(cmd):
+            return self.run_scheduled_command(cmd, background, save_logs)
+        
+        try:
+            # Commands expected to take longest (and the chains behind them) start first
+            estimates = self.history.estimates(commands_to_run) if self.history else None
+            # Group limits may be declared on any command of the catalog
+            batch = BatchRun(commands_to_run, self.engine, job,
+                             on_finished=self.on_batch_finished, estimates=estimates,
+                             limits=group_limits(self.model.to_list()))
+        except DependencyError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        
+        self.batches.add(batch)
+        if not self.engine.is_busy():
+            # Status counts cover everything started until the engine is idle again
+            self.burst_base = self.engine.counts()
+        self.batch_report = None
+        self.update_status(f"Queued {len(commands_to_run)} command(s)...")
+        # Each command starts as soon as its dependencies succeed and a slot is free
+        batch.start()
+    
+    def on_batch_finished(self, batch):
+        """Called on the engine thread when every command of a batch is settled"""
+        self.engine.defer(self.result_cache.save)
+        self.updates.call(self.report_batch, batch)
+    
+    def report_batch(self, batch):
+        """Show how a finished batch went"""
+        self.batches.discard(batch)
+        if len(batch.nodes) > 1:
+            self.batch_report = f"Batch done: {batch.summary()}"
+        self.update_status_with_process_count()
+    
+    def apply_max_parallel(self):
+        """Push the "Max parallel" value to the engine
+        
+        On agents, the agents' slots are the limit instead.
+        """
+        if self.agents is not None and self.agents.total_slots:
+            self.engine.set_max_workers(self.agents.total_slots)
+            return
+        try:
+            limit = int(self.max_parallel.get())
+        except (tk.TclError, ValueError):
+            limit = self.engine.max_workers
+        if limit < 1:
+            limit = 1
+        self.engine.set_max_workers(limit)
+    
+    def connect_agents(self, addresses):
+        """Start connecting to the agents that background commands will run on"""
+        if not addresses:
+            return
+        try:
+            self.agents = AgentPool(addresses, agent_token(), on_exit=self.on_process_exit)
+        except ValueError as e:
+            print(f"Not using agents: {e}")
+            return
+        future = self.engine.run_coroutine(self.agents.connect())
+        future.add_done_callback(
+            lambda done: self.updates.call(self.agents_connected, done.result()))
+    
+    def agents_connected(self, errors):
+        """Report which agents answered"""
+        for error in errors:
+            print(f"Agent unavailable: {error}")
+        connected = self.agents.connected
+        self.update_status(f"Connected to {len(connected)} of {len(self.agents.agents)} "
+                           f"agent(s), {self.agents.total_slots} slot(s)")
+    
+    async def run_scheduled_command(self, cmd, background, save_logs=False):
+        """Engine job: launch a command and hold the slot while it runs
+        
+        Background commands keep their slot until they exit; terminal
+        commands only until their window has been opened. Commands with a
+        cache entry are skipped when their inputs are unchanged since their
+        last successful run. Timeouts and retries apply to background runs.
+        """
+        hit, fingerprint = await self.engine.call(self.result_cache.check, cmd)
+        if hit:
+            # Counted in the status line through the cache hit count
+            return True
+        
+        try:
+            if not background:
+                await self.engine.call(launch_command, cmd, False)
+                return True
+            log_dir = self.logs_dir if save_logs else None
+            record = await self.engine.run_with_policy(cmd, log_dir=log_dir,
+                                                       executor=self.agents)
+        except Exception as e:
+            self.updates.call(messagebox.showerror, "Error",
+                              f"Failed to run command '{cmd['name']}':\n{str(e)}")
+            return False
+        
+        ok = record.returncode == 0
+        if ok and fingerprint:
+            await self.engine.call(self.result_cache.record_success, cmd, fingerprint)
+        return ok
+    
+    def on_engine_change(self):
+        """Called on the engine thread whenever its counts change"""
+        self.updates.mark('status')
+    
+    def apply_updates(self):
+        """Apply everything other threads posted since the last frame in one go"""
+        frame = self.updates.drain(self.MAX_EVENTS_PER_FRAME)
+        if frame:
+            if frame.marked('timing'):
+                self.refresh_timing(frame.keys('timing'))
+            if frame.marked('status'):
+                self.update_status_with_process_count()
+            for func, args in frame.calls:
+                try:
+                    func(*args)
+                except Exception as e:
+                    print(f"UI update failed: {e}")
+        self.root.after(self.UI_FRAME_MS, self.apply_updates)
+    
+    def terminate_all(self):
+        """Terminate all running background processes and their children"""
+        queued = self.engine.counts()['queued']
+        running = self.tracker.records() + self.lingering_trees()
+        remote = self.agents.count() if self.agents is not None else 0
+        if not running and not queued and not remote:
+            messagebox.showinfo("Info", "No background processes are running.")
+            return
+        
+        message = f"Terminate {len(running) + remote} running background process(es)?"
+        if remote:
+            message += f"\n{remote} of them run on agents."
+        if queued:
+            message += f"\n{queued} queued command(s) will be cancelled."
+        
+        if messagebox.askyesno("Confirm Termination", message):
+            # Stop queued commands from starting before terminating the running ones
+            for batch in list(self.batches):
+                batch.cancel()
+            self.engine.cancel_pending()
+            if remote:
+                # Agents stop their commands' process groups the same way
+                self.engine.run_coroutine(self.agents.stop_all())
+            
+            if not running:
+                self.update_status_with_process_count()
+                return
+            self.update_status(f"Terminating {len(running)} background process(es)...")
+            
+            # Signal every group at once and wait off the UI thread; stragglers get SIGKILL
+            def stop():
+                survivors = shutdown_processes(running, self.SHUTDOWN_TIMEOUT)
+                self.updates.call(self.finish_termination, running, survivors)
+            
+            thread = threading.Thread(target=stop, name="launcher-shutdown")
+            thread.daemon = True
+            thread.start()
+    
+    def finish_termination(self, records, survivors):
+        """Report how long each process took to stop"""
+        for record in records:
+            if record.shutdown_seconds is not None:
+                state = "killed" if record.force_killed else "stopped"
+                print(f"{record.name} (pid {record.pid}) {state} "
+                      f"in {record.shutdown_seconds:.2f}s")
+        if survivors:
+            self.force_kill_remaining(survivors)
+        self.update_status(describe_shutdown(records))
+        
+        # Update status after a delay to show current state
+        self.root.after(3000, self.update_status_with_process_count)
+    
+    def force_kill_remaining(self, records=None):
+        """Force kill any remaining processes that didn't terminate gracefully
+        
+        Kills the whole process group of each record (all tracked processes
+        by default) and returns how many were still alive.
+        """
+        if records is None:
+            records = self.tracker.records() + self.lingering_trees()
+        groups = live_groups()
+        killed = 0
+        for record in records:
+            if tree_alive(record, groups) and signal_tree(record, force=True):
+                record.force_killed = True
+                killed += 1
+        return killed
+    
+    def lingering_trees(self):
+        """Finished commands whose children are still running in their group
+
+        A record is dropped for good once its group is seen empty, so a
+        process group that later reuses the number is never signalled.
+        """
+        finished = list(self.lingering)
+        if not finished:
+            return []
+        groups = live_groups()
+        alive = []
+        for record in finished:
+            if tree_alive(record, groups):
+                alive.append(record)
+            else:
+                self.lingering.remove(record)
+        return alive
+    
+    def get_running_processes_count(self):
+        """Get the number of currently running background processes, here and on agents"""
+        count = self.tracker.count()
+        if self.agents is not None:
+            count += self.agents.count()
+        return count
+    
+    def update_status_with_process_count(self):
+        """Update status to show running process count"""
+        count = self.get_running_processes_count()
+        counts = self.engine.counts()
+        if counts['queued'] or counts['running']:
+            # One aggregated line however many processes changed state since the last frame
+            base = self.burst_base or dict.fromkeys(counts, 0)
+            started = counts['running'] + counts['done'] - base['done']
+            retried = counts['retried'] - base['retried']
+            timed_out = counts['timed_out'] - base['timed_out']
+            extra = ""
+            if retried:
+                extra += f", retried {retried}"
+            if timed_out:
+                extra += f", timed out {timed_out}"
+            self.update_status(f"Started {started}, running {counts['running']}, "
+                               f"queued {counts['queued']}, failed {counts['failed'] - base['failed']}"
+                               f"{extra} - {count} background process(es) running{self.cache_status()}")
+            return
+        
+        self.burst_base = None
+        message = self.batch_report or "Ready"
+        if count > 0:
+            message += f" - {count} background process(es) running"
+        self.update_status(f"{message}{self.cache_status()}{self.agent_status()}")
+    
+    def cache_status(self):
+        """Status line suffix with result cache hits and misses, if any"""
+        hits, misses = self.result_cache.counts()
+        if not hits and not misses:
+            return ""
+        return f" - cache: {hits} hit(s), {misses} miss(es)"
+    
+    def agent_status(self):
+        """Status line suffix with each agent's throughput, once agents have run commands"""
+        if self.agents is None:
+            return ""
+        rates = [f"{agent.name} {agent.stats.throughput:.2f}/s" for agent in self.agents.agents
+                 if agent.stats.finished]
+        if not rates:
+            return ""
+        return " - agents: " + ", ".join(rates)
+    
+    def show_output(self):
+        """Open (or raise) the window tailing background process output"""
+        if self.output_viewer is None or not self.output_viewer.exists():
+            self.output_viewer = OutputViewer(self.root, self.tracker)
+        else:
+            self.output_viewer.show()
+    
+    def show_dashboard(self):
+        """Open (or raise) the live resource usage window"""
+        if self.dashboard is None or not self.dashboard.exists():
+            self.dashboard = ResourceDashboard(self.root, self.tracker, self.sampler)
+        else:
+            self.dashboard.show()
+    
+    def on_process_exit(self, record):
+        """Called from the engine thread the moment a background process exits"""
+        if record.pgid is not None and group_exists(record.pgid):
+            self.lingering.append(record)
+        if self.history:
+            self.history.add_record(record)
+            self.updates.mark('timing', record.cmd_id)
+        self.updates.mark('status')
+    
+    def command_timing(self, cmd):
+        """Timing column text: duration percentiles over recent runs"""
+        stats = self.history.stats(cmd.get('id'), cmd['name']) if self.history else None
+        return stats.describe() if stats else ""
+    
+    def refresh_timing(self, cmd_ids):
+        """Re-render the rows of commands whose runs finished"""
+        rows = [cmd_id for cmd_id in cmd_ids if cmd_id in self.model]
+        if rows:
+            self.command_list.update_rows(rows)
+    
+    def update_status(self, message):
+        """Update status label"""
+        self.status_label.config(text=message)
+    
+    def on_closing(self):
+        """Handle application closing"""
+        # Terminate any running background processes
+        for batch in list(self.batches):
+            batch.cancel()
+        self.engine.cancel_pending()
+        self.sampler.stop()
+        running = self.tracker.records() + self.lingering_trees()
+        if running:
+            shutdown_processes(running, timeout=1.0, kill_timeout=0.5)
+        if self.agents is not None:
+            # Agents stop the commands of a launcher that hangs up
+            self.engine.run_coroutine(self.agents.close()).result(timeout=5)
+        self.engine.close()
+        
+        # A partially loaded catalog must never overwrite the snapshot
+        if self.store.pending_ops and not self.loading:
+            self.save_commands()
+        self.store.close()
+        self.result_cache.save()
+        if self.history:
+            self.history.close()
+        self.root.destroy()
+
+class CommandDialog:
+    def __init__(self, parent, title, name="", command="", depends_on=()):
+        self.result = None
+        
+        # Create dialog window
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title(title)
+        self.dialog.geometry("500x250")
+        self.dialog.resizable(True, False)
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+        
+        # Center the dialog
+        self.dialog.geometry("+%d+%d" % (parent.winfo_rootx() + 50, 
+                                        parent.winfo_rooty() + 50))
+        
+        # Create widgets
+        main_frame = ttk.Frame(self.dialog, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        self.dialog.columnconfigure(0, weight=1)
+        self.dialog.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(1, weight=1)
+        
+        # Name field
+        ttk.Label(main_frame, text="Name:").grid(row=0, column=0, sticky=tk.W, pady=(0, 5))
+        self.name_var = tk.StringVar(value=name)
+        name_entry = ttk.Entry(main_frame, textvariable=self.name_var, width=50)
+        name_entry.grid(row=0, column=1, sticky=(tk.W, tk.E), pady=(0, 5))
+        
+        # Command field
+        ttk.Label(main_frame, text="Command:").grid(row=1, column=0, sticky=(tk.W, tk.N), pady=(0, 5))
+        self.command_var = tk.StringVar(value=command)
+        command_entry = ttk.Entry(main_frame, textvariable=self.command_var, width=50)
+        command_entry.grid(row=1, column=1, sticky=(tk.W, tk.E), pady=(0, 5))
+        
+        # Example label
+        example_text = "Example: cd C:\\MyProject && python main.py"
+        ttk.Label(main_frame, text=example_text, font=('Arial', 8), 
+                 foreground='gray').grid(row=2, column=1, sticky=tk.W, pady=(0, 10))
+        
+        # Dependencies field
+        ttk.Label(main_frame, text="Depends on:").grid(row=3, column=0, sticky=tk.W, pady=(0, 5))
+        self.depends_var = tk.StringVar(value=", ".join(depends_on))
+        depends_entry = ttk.Entry(main_frame, textvariable=self.depends_var, width=50)
+        depends_entry.grid(row=3, column=1, sticky=(tk.W, tk.E), pady=(0, 5))
+        ttk.Label(main_frame, text="Comma-separated command names that must succeed first", 
+                 font=('Arial', 8), foreground='gray').grid(row=4, column=1, sticky=tk.W)
+        
+        # Buttons
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=5, column=0, columnspan=2, pady=(10, 0))
+        
+        ttk.Button(button_frame, text="OK", command=self.ok_clicked).grid(row=0, column=0, padx=(0, 5))
+        ttk.Button(button_frame, text="Cancel", command=self.cancel_clicked).grid(row=0, column=1, padx=(5, 0))
+        
+        # Focus and bindings
+        name_entry.focus()
+        name_entry.select_range(0, tk.END)
+        
+        self.dialog.bind('<Return>', lambda e: self.ok_clicked())
+        self.dialog.bind('<Escape>', lambda e: self.cancel_clicked())
+        
+        # Wait for dialog to close
+        self.dialog.wait_window()
+    
+    def ok_clicked(self):
+        name = self.name_var.get().strip()
+        command = self.command_var.get().strip()
+        
+        if not name:
+            messagebox.showwarning("Warning", "Please enter a name for the command.")
+            return
+        
+        if not command:
+            messagebox.showwarning("Warning", "Please enter a command.")
+            return
+        
+        depends_on = [dep.strip() for dep in self.depends_var.get().split(',') if dep.strip()]
+        if name in depends_on:
+            messagebox.showwarning("Warning", "A command cannot depend on itself.")
+            return
+        
+        self.result = (name, command, depends_on)
+        self.dialog.destroy()
+    
+    def cancel_clicked(self):
+        self.dialog.destroy()
+
+def main():
+    root = tk.Tk()
+    
+    # Set up the application icon (optional)
+    try:
+        # You can add an icon file here if you have one
+        # root.iconbitmap('icon.ico')
+        pass
+    except:
+        pass
+    
+    app = CommandLauncher(root)
+    root.mainloop()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,221 @@
+import collections
+import math
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    command_id INTEGER,
+    name TEXT NOT NULL,
+    command TEXT NOT NULL,
+    start_time REAL NOT NULL,
+    end_time REAL NOT NULL,
+    exit_code INTEGER,
+    peak_rss INTEGER,
+    output_bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_by_command ON runs (command_id, name);
+"""
+
+COLUMNS = ('command_id', 'name', 'command', 'start_time', 'end_time',
+           'exit_code', 'peak_rss', 'output_bytes')
+
+
+def history_key(cmd_id, name):
+    """Runs are grouped by command id, or by name for commands without one"""
+    return cmd_id if cmd_id is not None else name
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class CommandStats:
+    """Run count and duration percentiles of one saved command"""
+
+    def __init__(self, runs, p50, p95, last_exit_code):
+        self.runs = runs
+        self.p50 = p50
+        self.p95 = p95
+        self.last_exit_code = last_exit_code
+
+    def describe(self):
+        if self.p50 is None:
+            return "no successful runs"
+        return f"p50 {self.p50:.1f}s / p95 {self.p95:.1f}s"
+
+
+def open_history(path):
+    """RunHistory at ``path``, or None if the database can't be opened"""
+    try:
+        return RunHistory(path)
+    except sqlite3.Error as e:
+        print(f"Run history disabled: {e}")
+        return None
+
+
+class RunHistory:
+    """SQLite log of finished runs plus in-memory duration statistics
+
+    ``add`` only appends to an in-memory queue; a writer thread commits the
+    queue in one transaction every ``flush_interval`` seconds (or sooner once
+    ``batch_size`` runs are waiting), so launching many commands never waits
+    on disk. The durations of the last ``SAMPLE_SIZE`` successful runs of
+    each command are kept in memory, so percentiles never touch the
+    database; failed runs are logged and counted but would skew timings.
+    """
+
+    SAMPLE_SIZE = 100
+
+    def __init__(self, path, flush_interval=1.0, batch_size=500):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._lock = threading.Lock()
+        self._queue = []
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._durations = {}
+        self._counts = collections.Counter()
+        self._last_exit = {}
+
+        connection = self._connect()
+        try:
+            self._load(connection)
+        finally:
+            connection.close()
+
+        self._writer = threading.Thread(target=self._write_loop, name="launcher-history")
+        self._writer.daemon = True
+        self._writer.start()
+
+    def add(self, cmd_id, name, command, start_time, end_time, exit_code,
+            peak_rss=None, output_bytes=None):
+        """Queue a finished run for writing and update the statistics"""
+        row = (cmd_id, name, command, start_time, end_time, exit_code, peak_rss, output_bytes)
+        with self._lock:
+            self._queue.append(row)
+            self._remember(row)
+            due = len(self._queue) >= self.batch_size
+        if due:
+            self._wakeup.set()
+
+    def add_record(self, record):
+        """Queue a finished TrackedProcess"""
+        peak_rss = None
+        if record.metrics is not None and record.metrics.times.samples:
+            peak_rss = int(record.metrics.series['rss_bytes'].peak)
+        output_bytes = record.output.total if record.output is not None else None
+        self.add(record.cmd_id, record.name, record.command, record.start_time,
+                 record.end_time, record.returncode, peak_rss, output_bytes)
+
+    def stats(self, cmd_id, name):
+        """CommandStats for a command, or None if it never ran
+
+        The percentiles are None if none of its runs succeeded.
+        """
+        key = history_key(cmd_id, name)
+        with self._lock:
+            if not self._counts[key]:
+                return None
+            ordered = sorted(self._durations.get(key, ()))
+            return CommandStats(self._counts[key], percentile(ordered, 0.5),
+                                percentile(ordered, 0.95), self._last_exit.get(key))
+
+    def estimate(self, cmd):
+        """Typical (median) duration of a command dict, or None"""
+        stats = self.stats(cmd.get('id'), cmd['name'])
+        return stats.p50 if stats else None
+
+    def estimates(self, commands):
+        """Expected duration of each command, for longest-first scheduling
+
+        Commands that never ran are assumed to take as long as the median
+        of those that did. Returns None when none of them has a history.
+        """
+        known = [self.estimate(cmd) for cmd in commands]
+        measured = sorted(value for value in known if value is not None)
+        if not measured:
+            return None
+        default = percentile(measured, 0.5)
+        return [default if value is None else value for value in known]
+
+    def flush(self):
+        """Ask the writer to commit whatever is queued now"""
+        self._wakeup.set()
+
+    def close(self):
+        """Write everything still queued and stop the writer"""
+        self._closed = True
+        self._wakeup.set()
+        self._writer.join()
+
+    def _remember(self, row):
+        # Caller holds the lock
+        cmd_id, name, _, start_time, end_time, exit_code = row[:6]
+        key = history_key(cmd_id, name)
+        if exit_code == 0:
+            self._add_duration(key, end_time - start_time)
+        self._counts[key] += 1
+        self._last_exit[key] = exit_code
+
+    def _add_duration(self, key, duration):
+        durations = self._durations.get(key)
+        if durations is None:
+            durations = self._durations[key] = collections.deque(maxlen=self.SAMPLE_SIZE)
+        durations.append(duration)
+
+    def _connect(self):
+        connection = sqlite3.connect(str(self.path))
+        connection.executescript(SCHEMA)
+        return connection
+
+    def _load(self, connection):
+        counts = connection.execute(
+            "SELECT command_id, name, COUNT(*) FROM runs GROUP BY command_id, name")
+        for cmd_id, name, count in counts:
+            self._counts[history_key(cmd_id, name)] += count
+
+        last = connection.execute(
+            "SELECT command_id, name, exit_code FROM runs"
+            " WHERE id IN (SELECT MAX(id) FROM runs GROUP BY command_id, name)")
+        for cmd_id, name, exit_code in last:
+            self._last_exit[history_key(cmd_id, name)] = exit_code
+
+        # Only the most recent successful runs of each command feed the percentiles
+        recent = connection.execute(
+            "SELECT command_id, name, end_time - start_time FROM ("
+            " SELECT *, ROW_NUMBER() OVER (PARTITION BY command_id, name ORDER BY id DESC) AS n"
+            " FROM runs WHERE exit_code = 0) WHERE n <= ? ORDER BY id", (self.SAMPLE_SIZE,))
+        for cmd_id, name, duration in recent:
+            self._add_duration(history_key(cmd_id, name), duration)
+
+    def _write_loop(self):
+        # sqlite3 connections belong to the thread that opened them
+        connection = self._connect()
+        try:
+            while True:
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+                with self._lock:
+                    rows, self._queue = self._queue, []
+                if rows:
+                    try:
+                        with connection:
+                            connection.executemany(
+                                f"INSERT INTO runs ({', '.join(COLUMNS)}) "
+                                f"VALUES ({', '.join('?' * len(COLUMNS))})", rows)
+                    except sqlite3.Error as e:
+                        print(f"Failed to write run history: {e}")
+                if self._closed:
+                    with self._lock:
+                        if not self._queue:
+                            break
+        finally:
+            connection.close()
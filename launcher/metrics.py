@@ -0,0 +1,320 @@
+import os
+import threading
+import time
+from array import array
+
+PROC = '/proc'
+# Seconds after a process starts before it is sampled; the regular
+# interval would miss commands shorter than it
+FIRST_SAMPLE_DELAY = 0.25
+
+
+def metrics_available():
+    """Whether per-process counters can be read (Linux /proc)"""
+    return os.path.exists(os.path.join(PROC, 'self', 'stat'))
+
+
+class MetricSeries:
+    """Bounded time series of one metric stored in a flat array of doubles
+
+    The newest ``capacity`` samples are kept in a ring; the peak and the
+    running total cover every sample ever added, so a long run's summary
+    does not depend on how much history is retained.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._values = array('d', bytes(8 * capacity))
+        self._next = 0
+        self.samples = 0
+        self.peak = 0.0
+        self.total = 0.0
+
+    def append(self, value):
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        self.samples += 1
+        self.total += value
+        if value > self.peak:
+            self.peak = value
+
+    @property
+    def latest(self):
+        if not self.samples:
+            return 0.0
+        return self._values[self._next - 1]
+
+    @property
+    def average(self):
+        return self.total / self.samples if self.samples else 0.0
+
+    def values(self):
+        """Retained samples, oldest first"""
+        if self.samples < self.capacity:
+            return self._values[:self._next].tolist()
+        return self._values[self._next:].tolist() + self._values[:self._next].tolist()
+
+
+class ProcessMetrics:
+    """CPU, memory and I/O history of one tracked process and its descendants"""
+
+    FIELDS = ('cpu_percent', 'rss_bytes', 'read_bytes_per_s', 'write_bytes_per_s')
+
+    def __init__(self, history=300):
+        self.times = MetricSeries(history)
+        self.series = {field: MetricSeries(history) for field in self.FIELDS}
+        # Processes in the tree at the last sample
+        self.process_count = 0
+
+    def add(self, timestamp, **values):
+        self.times.append(timestamp)
+        for field, value in values.items():
+            self.series[field].append(value)
+
+    def latest(self, field):
+        return self.series[field].latest
+
+    def summary(self):
+        """Peak and average of every metric over the whole run"""
+        summary = {'samples': self.times.samples}
+        for field, series in self.series.items():
+            summary[field] = {'peak': round(series.peak, 2), 'average': round(series.average, 2)}
+        return summary
+
+
+class ResourceSampler:
+    """Periodically read /proc counters for every tracked process tree
+
+    One background thread wakes up every ``interval`` seconds and samples
+    all running records in a single pass: it finds each record's
+    descendants, reads ``stat``, ``statm`` and ``io`` once per process, and
+    appends CPU%, RSS and I/O rates to the record's ``metrics``. CPU and
+    I/O rates come from the change in each process's counters since the
+    previous pass, so processes that appear or exit in between do not
+    produce spikes; a process's first pass records its RSS with zero
+    rates, so every series stays aligned with ``times``. Nothing
+    is read while no process is running. ``process_started`` (the
+    tracker's ``on_start``) brings the next pass forward to
+    FIRST_SAMPLE_DELAY after a start, so short commands still get sampled.
+    """
+
+    def __init__(self, tracker, interval=1.0, history=300):
+        self.tracker = tracker
+        self.interval = interval
+        self.history = history
+        self.available = metrics_available()
+
+        self._clock_ticks = os.sysconf('SC_CLK_TCK') if self.available else 100
+        self._page_size = os.sysconf('SC_PAGE_SIZE') if self.available else 4096
+        # Whether /proc/<pid>/task/<tid>/children exists on this kernel
+        self._children_files = None
+        # Counters from the previous pass: {record: {pid: (ticks, read, write)}}
+        self._previous = {}
+        self._last_time = None
+        self._pass_stats = self._pass_children = None
+        self._wakeup = threading.Event()
+        self._started = False
+        self._stopped = False
+        self._thread = None
+
+    def start(self):
+        if not self.available or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="launcher-sampler")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stopped = True
+        self._wakeup.set()
+
+    def process_started(self, record=None):
+        """Sample soon: a process has just started"""
+        self._started = True
+        self._wakeup.set()
+
+    def set_interval(self, interval):
+        self.interval = max(0.1, float(interval))
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stopped:
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"Resource sampling failed: {e}")
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if self._started:
+                # Give new processes a moment to grow; also caps bursts of starts
+                # at one pass per delay
+                self._started = False
+                time.sleep(FIRST_SAMPLE_DELAY)
+
+    def sample(self):
+        """Take one sample of every running record"""
+        records = self.tracker.records()
+        if not records:
+            self._previous.clear()
+            self._last_time = None
+            return
+
+        now = time.monotonic()
+        elapsed = now - self._last_time if self._last_time is not None else None
+        self._last_time = now
+
+        self._pass_stats = self._pass_children = None
+        previous, self._previous = self._previous, {}
+        for record in records:
+            if record.metrics is None:
+                record.metrics = ProcessMetrics(self.history)
+            tree = self._process_tree(record.pid)
+            counters = {}
+            rss = 0
+            for pid, stat in tree.items():
+                fields = stat.rsplit(')', 1)[1].split()
+                ticks = int(fields[11]) + int(fields[12])
+                read_bytes, write_bytes = self._read_io(pid)
+                counters[pid] = (ticks, read_bytes, write_bytes)
+                rss += self._read_rss(pid)
+            self._previous[record] = counters
+
+            record.metrics.process_count = len(counters)
+            before = previous.get(record)
+            if before is None or not elapsed:
+                # First sight of this process: rates need a previous pass to diff
+                # against, but every series gets a value so they stay aligned
+                record.metrics.add(time.time(), cpu_percent=0.0, rss_bytes=float(rss),
+                                   read_bytes_per_s=0.0, write_bytes_per_s=0.0)
+                continue
+            ticks = read_bytes = write_bytes = 0
+            for pid, (pid_ticks, pid_read, pid_write) in counters.items():
+                # A process that started since the last pass counts from zero
+                old_ticks, old_read, old_write = before.get(pid, (0, 0, 0))
+                ticks += max(0, pid_ticks - old_ticks)
+                read_bytes += max(0, pid_read - old_read)
+                write_bytes += max(0, pid_write - old_write)
+
+            record.metrics.add(
+                time.time(),
+                cpu_percent=100.0 * ticks / self._clock_ticks / elapsed,
+                rss_bytes=float(rss),
+                read_bytes_per_s=read_bytes / elapsed,
+                write_bytes_per_s=write_bytes / elapsed,
+            )
+
+    def _process_tree(self, root):
+        """``{pid: stat line}`` for a process and all of its descendants"""
+        if self._children_files is not False:
+            tree = self._walk_children(root)
+            if tree is not None:
+                return tree
+        # No children files on this kernel: one /proc scan per pass serves every tree
+        if self._pass_children is None:
+            self._pass_stats = self._scan_stats()
+            self._pass_children = {}
+            for pid, stat in self._pass_stats.items():
+                ppid = int(stat.rsplit(')', 1)[1].split(None, 2)[1])
+                self._pass_children.setdefault(ppid, []).append(pid)
+
+        tree = {}
+        stack = [root]
+        while stack:
+            pid = stack.pop()
+            if pid in tree or pid not in self._pass_stats:
+                continue
+            tree[pid] = self._pass_stats[pid]
+            stack.extend(self._pass_children.get(pid, ()))
+        return tree
+
+    def _walk_children(self, root):
+        # Follows /proc/<pid>/task/<tid>/children; None if the kernel lacks them
+        tree = {}
+        stack = [root]
+        while stack:
+            pid = stack.pop()
+            if pid in tree:
+                continue
+            stat = self._read_stat(pid)
+            if stat is None:
+                continue
+            tree[pid] = stat
+            children = self._read_children(pid)
+            if children is None:
+                return None
+            stack.extend(children)
+        return tree
+
+    def _read_children(self, pid):
+        children = []
+        try:
+            for tid in os.listdir(f'{PROC}/{pid}/task'):
+                with open(f'{PROC}/{pid}/task/{tid}/children', 'r') as f:
+                    children.extend(int(child) for child in f.read().split())
+        except FileNotFoundError:
+            if self._children_files is None and os.path.exists(f'{PROC}/{pid}/task'):
+                self._children_files = False
+                return None
+            # The process (or thread) exited while we looked
+            return children
+        except OSError:
+            return children
+        self._children_files = True
+        return children
+
+    @staticmethod
+    def _read_stat(pid):
+        try:
+            with open(f'{PROC}/{pid}/stat', 'r') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _scan_stats(self):
+        stats = {}
+        for entry in os.listdir(PROC):
+            if entry.isdigit():
+                stat = self._read_stat(entry)
+                if stat is not None:
+                    stats[int(entry)] = stat
+        return stats
+
+    def _read_rss(self, pid):
+        try:
+            with open(f'{PROC}/{pid}/statm', 'r') as f:
+                return int(f.read().split()[1]) * self._page_size
+        except (OSError, IndexError, ValueError):
+            return 0
+
+    @staticmethod
+    def _read_io(pid):
+        read_bytes = write_bytes = 0
+        try:
+            with open(f'{PROC}/{pid}/io', 'r') as f:
+                for line in f:
+                    if line.startswith('read_bytes:'):
+                        read_bytes = int(line.split()[1])
+                    elif line.startswith('write_bytes:'):
+                        write_bytes = int(line.split()[1])
+        except (OSError, ValueError):
+            pass
+        return read_bytes, write_bytes
+
+
+def export_summaries(records):
+    """Peak and average resource use of each record, ready for json.dump"""
+    rows = []
+    for record in records:
+        if record.metrics is None:
+            continue
+        row = {
+            'name': record.name,
+            'command': record.command,
+            'pid': record.pid,
+            'start_time': record.start_time,
+            'end_time': record.end_time,
+            'returncode': record.returncode,
+        }
+        row.update(record.metrics.summary())
+        rows.append(row)
+    return rows
@@ -0,0 +1,148 @@
+import itertools
+
+
+class CommandModel:
+    """Ordered collection of saved commands keyed by a stable integer id
+
+    Each command is a dict with ``id``, ``name`` and ``command`` keys (plus
+    any extra fields from commands.json). Ids are persisted, so views and
+    other components can refer to a command without relying on its position.
+    Adding, updating and removing a command are all O(1).
+    """
+
+    def __init__(self, commands=()):
+        self._items = {}
+        self._next_id = 1
+        # Insertion sequence per id, so any subset can be put in display order
+        self._order = {}
+        self._next_seq = 0
+        # Ids handed out to commands that arrived without a valid one
+        self.assigned = 0
+        # (sequence, command) for commands still waiting for an id, see extend
+        self._deferred = []
+        self.load(commands)
+
+    def load(self, commands):
+        """Replace the contents, giving an id to any command without a valid one
+
+        Returns how many ids had to be assigned.
+        """
+        self._items = {}
+        self._order = {}
+        self._deferred = []
+        self._next_id = 1
+        self.assigned = 0
+        self.extend(commands, defer=True)
+        self.assign_deferred()
+        return self.assigned
+
+    def extend(self, commands, defer=False):
+        """Append commands that may already carry ids (e.g. a batch being loaded)
+
+        With ``defer``, commands without a valid id (or with one already
+        taken) keep their place in the display order but only get an id
+        from ``assign_deferred``, once every saved id has been seen, so a
+        valid id further down the file is never renumbered. Returns the ids
+        of the commands appended now.
+        """
+        ids = []
+        for cmd in commands:
+            if not self._valid_id(cmd.get('id')) or cmd['id'] in self._items:
+                if defer:
+                    self._deferred.append((self._next_seq, cmd))
+                    self._next_seq += 1
+                    continue
+                cmd['id'] = self._allocate_id()
+                self.assigned += 1
+            elif cmd['id'] >= self._next_id:
+                self._next_id = cmd['id'] + 1
+            self._store(cmd)
+            ids.append(cmd['id'])
+        return ids
+
+    def assign_deferred(self):
+        """Give ids to the commands ``extend`` deferred; returns the new ids"""
+        if not self._deferred:
+            return []
+        ids = []
+        for seq, cmd in self._deferred:
+            cmd['id'] = self._allocate_id()
+            self.assigned += 1
+            self._items[cmd['id']] = cmd
+            self._order[cmd['id']] = seq
+            ids.append(cmd['id'])
+        self._deferred = []
+        # Put them back where they were in the file
+        self._items = {cmd_id: self._items[cmd_id]
+                       for cmd_id in sorted(self._items, key=self._order.__getitem__)}
+        return ids
+
+    def reserve_ids(self, next_id):
+        """Never hand out an id below ``next_id`` (e.g. ids of deleted commands)"""
+        self._next_id = max(self._next_id, next_id)
+
+    def add(self, cmd):
+        """Append a command, assigning it a fresh id; returns the stored dict"""
+        cmd = dict(cmd)
+        cmd['id'] = self._allocate_id()
+        self._store(cmd)
+        return cmd
+
+    def update(self, cmd_id, **fields):
+        """Change fields of a command in place; returns the stored dict"""
+        cmd = self._items[cmd_id]
+        cmd.update(fields)
+        return cmd
+
+    def remove(self, cmd_ids):
+        """Remove commands by id; returns the removed dicts"""
+        removed = []
+        for cmd_id in cmd_ids:
+            if cmd_id in self._items:
+                removed.append(self._items.pop(cmd_id))
+                del self._order[cmd_id]
+        return removed
+
+    def get(self, cmd_id):
+        return self._items[cmd_id]
+
+    def ids(self):
+        return list(self._items)
+
+    def ordered(self, cmd_ids, limit=None):
+        """Put a subset of ids (e.g. search results) into display order
+
+        With ``limit``, only the first ``limit`` of them.
+        """
+        if len(cmd_ids) * 8 > len(self._items):
+            # Large subsets: one pass over the display order is cheaper than sorting
+            matches = (cmd_id for cmd_id in self._items if cmd_id in cmd_ids)
+            return list(itertools.islice(matches, limit))
+        return sorted(cmd_ids, key=self._order.__getitem__)[:limit]
+
+    def to_list(self):
+        """The commands in display order, as saved to commands.json"""
+        return list(self._items.values())
+
+    def __contains__(self, cmd_id):
+        return cmd_id in self._items
+
+    def __iter__(self):
+        return iter(self._items.values())
+
+    def __len__(self):
+        return len(self._items)
+
+    @staticmethod
+    def _valid_id(cmd_id):
+        return isinstance(cmd_id, int) and not isinstance(cmd_id, bool) and cmd_id > 0
+
+    def _store(self, cmd):
+        self._items[cmd['id']] = cmd
+        self._order[cmd['id']] = self._next_seq
+        self._next_seq += 1
+
+    def _allocate_id(self):
+        cmd_id = self._next_id
+        self._next_id += 1
+        return cmd_id
@@ -0,0 +1,238 @@
+import atexit
+import collections
+import os
+import re
+import threading
+from pathlib import Path
+
+
+class RingBuffer:
+    """Fixed-size byte buffer that keeps the most recent output
+
+    ``total`` counts every byte ever written, so a reader can remember a
+    position and later fetch only what arrived since, without copying the
+    whole buffer on each refresh.
+    """
+
+    def __init__(self, capacity=256 * 1024):
+        self.capacity = capacity
+        self.total = 0
+        # Grows with the output until it first wraps; most commands print far
+        # less than the capacity, and zero-filling it up front is not free
+        self._data = bytearray()
+        self._lock = threading.Lock()
+
+    def write(self, data):
+        with self._lock:
+            total = self.total + len(data)
+            if len(data) > self.capacity:
+                # Only the tail can survive
+                data = data[-self.capacity:]
+            if total <= self.capacity:
+                self._data += data
+                self.total = total
+                return
+            if len(self._data) < self.capacity:
+                self._data.extend(bytes(self.capacity - len(self._data)))
+            start = (total - len(data)) % self.capacity
+            end = start + len(data)
+            if end <= self.capacity:
+                self._data[start:end] = data
+            else:
+                split = self.capacity - start
+                self._data[start:] = data[:split]
+                self._data[:end - self.capacity] = data[split:]
+            self.total = total
+
+    def read_since(self, position):
+        """Bytes written after ``position``; returns (data, new_position, skipped)
+
+        ``skipped`` is how many bytes after ``position`` were already overwritten.
+        """
+        with self._lock:
+            oldest = max(0, self.total - self.capacity)
+            skipped = max(0, oldest - position)
+            position = max(position, oldest)
+            size = self.total - position
+            if size <= 0:
+                return b'', self.total, skipped
+
+            start = position % self.capacity
+            end = start + size
+            if end <= self.capacity:
+                data = bytes(self._data[start:end])
+            else:
+                data = bytes(self._data[start:]) + bytes(self._data[:end - self.capacity])
+            return data, self.total, skipped
+
+    def getvalue(self):
+        """Everything still held in the buffer"""
+        return self.read_since(0)[0]
+
+
+class RotatingLog:
+    """Append-only log file that rolls over to ``.1``, ``.2``... at ``max_bytes``
+
+    The file is only created on the first write, so a LogWriter thread
+    does all of its disk I/O.
+    """
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backups=3):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        # Set by the LogWriter once a write fails; the log is then given up
+        self.failed = False
+        self._file = None
+        self._size = 0
+
+    def write(self, data):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'ab')
+            self._size = self._file.tell()
+        if self._size + len(data) > self.max_bytes and self._size > 0:
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _rotate(self):
+        self._file.close()
+        for index in range(self.backups - 1, 0, -1):
+            older = self.path.with_name(f"{self.path.name}.{index}")
+            if older.exists():
+                os.replace(older, self.path.with_name(f"{self.path.name}.{index + 1}"))
+        if self.backups > 0:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, 'ab')
+        self._size = 0
+
+
+class LogWriter:
+    """Thread that writes RotatingLogs, so a slow disk never stalls the engine loop
+
+    ``write`` only queues the data. At most ``max_pending`` bytes wait at a
+    time; past that ``write`` refuses the data and the caller counts it as
+    dropped, rather than blocking or letting the queue grow without bound.
+    """
+
+    FLUSH_TIMEOUT = 5.0
+
+    def __init__(self, max_pending=8 * 1024 * 1024):
+        self.max_pending = max_pending
+        self._pending = collections.deque()
+        self._pending_bytes = 0
+        self._busy = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def write(self, log, data, dropped=0):
+        """Queue ``data`` for ``log``; returns False if the queue is full
+
+        ``dropped`` bytes refused earlier are noted in the log first.
+        """
+        with self._condition:
+            if self._pending_bytes + len(data) > self.max_pending and self._pending_bytes:
+                return False
+            self._pending_bytes += len(data)
+            self._put((log, data, dropped))
+        return True
+
+    def close(self, log):
+        """Close ``log`` once everything queued for it is written"""
+        with self._condition:
+            self._put((log, None, 0))
+
+    def flush(self, timeout=None):
+        """Wait until everything queued is written; returns False on timeout"""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._busy,
+                                            timeout)
+
+    def _put(self, item):
+        self._pending.append(item)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="launcher-log-writer")
+            self._thread.daemon = True
+            self._thread.start()
+            atexit.register(self.flush, self.FLUSH_TIMEOUT)
+        self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending)
+                log, data, dropped = self._pending.popleft()
+                self._busy = True
+            try:
+                if data is None:
+                    log.close()
+                elif not log.failed:
+                    if dropped:
+                        log.write(f"\n[{dropped} bytes of output not logged: "
+                                  f"the log writer fell behind]\n".encode())
+                    log.write(data)
+            except OSError as e:
+                print(f"Failed to write output log: {e}")
+                log.failed = True
+                try:
+                    log.close()
+                except OSError:
+                    pass
+            with self._condition:
+                if data is not None:
+                    self._pending_bytes -= len(data)
+                self._busy = False
+                self._condition.notify_all()
+
+
+_log_writer = LogWriter()
+
+
+class OutputCapture:
+    """Captured output of one background process: a ring buffer plus an optional log
+
+    Log writes go through a LogWriter (a shared one by default), so
+    ``write`` never touches the disk.
+    """
+
+    def __init__(self, capacity=256 * 1024, log_path=None, log_max_bytes=10 * 1024 * 1024,
+                 log_writer=None):
+        self.buffer = RingBuffer(capacity)
+        self.log = RotatingLog(log_path, log_max_bytes) if log_path else None
+        self.log_writer = log_writer or _log_writer
+        self.open_streams = 0
+        # Bytes the log writer refused since the last chunk it took
+        self._log_dropped = 0
+
+    @property
+    def total(self):
+        return self.buffer.total
+
+    def write(self, data):
+        self.buffer.write(data)
+        if self.log is not None and not self.log.failed:
+            if self.log_writer.write(self.log, data, self._log_dropped):
+                self._log_dropped = 0
+            else:
+                self._log_dropped += len(data)
+
+    def stream_closed(self):
+        self.open_streams -= 1
+        if self.open_streams <= 0 and self.log is not None:
+            self.log_writer.close(self.log)
+            self.log = None
+
+
+def log_file_name(name, pid):
+    """A filesystem-safe log file name for a command run"""
+    safe = re.sub(r'[^\w.-]+', '_', name).strip('_') or 'command'
+    return f"{safe[:60]}-{pid}.log"
@@ -0,0 +1,139 @@
+import codecs
+import tkinter as tk
+from tkinter import ttk
+
+
+class OutputViewer:
+    """Window that tails the captured output of background processes
+
+    Each refresh asks the selected process's ring buffer only for the bytes
+    written since the last refresh, so the cost does not grow with the
+    buffer size. The text widget itself is trimmed to ``MAX_LINES``.
+    """
+
+    REFRESH_MS = 200
+    MAX_LINES = 5000
+
+    def __init__(self, parent, tracker):
+        self.tracker = tracker
+        self.records = []
+        self.current = None
+        self.position = 0
+        self.decoder = None
+        self._seen = None
+        self._after_id = None
+
+        self.window = tk.Toplevel(parent)
+        self.window.title("Process Output")
+        self.window.geometry("700x400")
+        self.window.columnconfigure(0, weight=1)
+        self.window.rowconfigure(1, weight=1)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        # Process chooser
+        top_frame = ttk.Frame(self.window, padding="5")
+        top_frame.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        top_frame.columnconfigure(1, weight=1)
+        ttk.Label(top_frame, text="Process:").grid(row=0, column=0, sticky=tk.W)
+        self.chooser = ttk.Combobox(top_frame, state='readonly')
+        self.chooser.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(5, 0))
+        self.chooser.bind('<<ComboboxSelected>>', self.on_choose)
+
+        # Output text
+        text_frame = ttk.Frame(self.window, padding=(5, 0, 5, 5))
+        text_frame.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        text_frame.columnconfigure(0, weight=1)
+        text_frame.rowconfigure(0, weight=1)
+        self.text = tk.Text(text_frame, wrap='none', state='disabled', font=('Courier', 9))
+        v_scrollbar = ttk.Scrollbar(text_frame, orient=tk.VERTICAL, command=self.text.yview)
+        self.text.configure(yscrollcommand=v_scrollbar.set)
+        self.text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        v_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+
+        self.refresh()
+
+    def show(self, record=None):
+        """Bring the window forward, optionally switching to a process"""
+        self.window.deiconify()
+        self.window.lift()
+        if record is not None:
+            self.select(record)
+
+    def close(self):
+        if self._after_id is not None:
+            self.window.after_cancel(self._after_id)
+            self._after_id = None
+        self.window.destroy()
+
+    def exists(self):
+        try:
+            return bool(self.window.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def refresh_choices(self):
+        """Rebuild the process list when processes start or exit"""
+        seen = (self.tracker.started_count, self.tracker.finished_count)
+        if seen == self._seen:
+            return
+        self._seen = seen
+
+        records = self.tracker.records() + list(reversed(self.tracker.recent))
+        self.records = [record for record in records if record.output is not None]
+        self.chooser.configure(values=[self.describe(record) for record in self.records])
+
+        if self.current in self.records:
+            self.chooser.current(self.records.index(self.current))
+        elif self.current is None and self.records:
+            self.select(self.records[0])
+
+    @staticmethod
+    def describe(record):
+        state = "running" if record.running else f"exit {record.returncode}"
+        if record.shutdown_seconds is not None:
+            verb = "killed" if record.force_killed else "stopped"
+            state += f", {verb} in {record.shutdown_seconds:.2f}s"
+        return f"{record.name} (pid {record.pid}) - {state}"
+
+    def on_choose(self, event):
+        index = self.chooser.current()
+        if 0 <= index < len(self.records):
+            self.select(self.records[index])
+
+    def select(self, record):
+        """Start tailing another process from the oldest byte still buffered"""
+        self.current = record
+        self.position = 0
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.text.configure(state='normal')
+        self.text.delete('1.0', tk.END)
+        self.text.configure(state='disabled')
+        if record in self.records:
+            self.chooser.current(self.records.index(record))
+        self.append_new_output()
+
+    def append_new_output(self):
+        if self.current is None or self.current.output is None:
+            return
+        data, self.position, skipped = self.current.output.buffer.read_since(self.position)
+        if not data and not skipped:
+            return
+
+        # Only follow the end if the user has not scrolled up
+        follow = self.text.yview()[1] >= 1.0
+        self.text.configure(state='normal')
+        if skipped:
+            self.text.insert(tk.END, f"[... {skipped} bytes dropped ...]\n")
+        self.text.insert(tk.END, self.decoder.decode(data))
+
+        lines = int(self.text.index('end-1c').split('.')[0])
+        if lines > self.MAX_LINES:
+            self.text.delete('1.0', f"{lines - self.MAX_LINES + 1}.0")
+        self.text.configure(state='disabled')
+        if follow:
+            self.text.see(tk.END)
+
+    def refresh(self):
+        self.refresh_choices()
+        self.append_new_output()
+        self._after_id = self.window.after(self.REFRESH_MS, self.refresh)
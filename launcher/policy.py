@@ -0,0 +1,100 @@
+"""Per-command timeouts, retries and group limits for background runs
+
+A saved command may carry any of these optional fields::
+
+    {"name": "Migrate", "command": "./migrate.sh",
+     "timeout": 300, "retries": 2, "retry_delay": 5,
+     "group": "db", "group_concurrency": 4, "group_per_minute": 30}
+
+``timeout`` is in seconds; a command still running by then is stopped the
+way "Terminate All" stops it (SIGTERM to its process group, SIGKILL if it
+lingers). A command that fails or times out is run again up to ``retries``
+more times, waiting ``retry_delay`` seconds (default 1) before the first
+retry and twice as long before each further one, up to MAX_RETRY_DELAY.
+
+Commands naming the same ``group`` share its limits: at most
+``group_concurrency`` of them run at once and at most ``group_per_minute``
+start in any 60 seconds. Either limit may be given on any command of the
+group; if commands disagree, the strictest wins. Invalid values are ignored.
+"""
+import math
+
+DEFAULT_RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 300.0
+RATE_WINDOW = 60.0
+
+
+def _number(value, minimum, integer=False):
+    """``value`` if it is a number no smaller than ``minimum``, else None"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    if not math.isfinite(value) or value < minimum:
+        return None
+    if integer:
+        if value != int(value):
+            return None
+        return int(value)
+    return float(value)
+
+
+def command_group(cmd):
+    """The name of the command's limit group, or None"""
+    group = cmd.get('group')
+    if isinstance(group, str) and group.strip():
+        return group.strip()
+    return None
+
+
+class RunPolicy:
+    """How one command is run in the background: deadline and retries"""
+
+    def __init__(self, timeout=None, retries=0, retry_delay=DEFAULT_RETRY_DELAY):
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+    @classmethod
+    def of(cls, cmd):
+        """The policy declared by a saved command"""
+        retry_delay = _number(cmd.get('retry_delay'), 0)
+        return cls(timeout=_number(cmd.get('timeout'), 0) or None,
+                   retries=_number(cmd.get('retries'), 0, integer=True) or 0,
+                   retry_delay=DEFAULT_RETRY_DELAY if retry_delay is None else retry_delay)
+
+    def delay(self, attempt):
+        """Seconds to wait before retry number ``attempt`` (1 for the first)"""
+        return min(self.retry_delay * 2 ** (attempt - 1), MAX_RETRY_DELAY)
+
+
+class GroupLimit:
+    """Concurrency and start-rate limits shared by the commands of a group"""
+
+    def __init__(self, concurrency=None, per_minute=None):
+        self.concurrency = concurrency
+        self.per_minute = per_minute
+
+    def tighten(self, concurrency=None, per_minute=None):
+        """Keep the stricter of the current and the given limits"""
+        if concurrency is not None:
+            self.concurrency = min(concurrency, self.concurrency or concurrency)
+        if per_minute is not None:
+            self.per_minute = min(per_minute, self.per_minute or per_minute)
+
+    def __bool__(self):
+        return self.concurrency is not None or self.per_minute is not None
+
+    def __repr__(self):
+        return f"GroupLimit(concurrency={self.concurrency}, per_minute={self.per_minute})"
+
+
+def group_limits(commands):
+    """``{group name: GroupLimit}`` for the groups of ``commands`` that declare limits"""
+    limits = {}
+    for cmd in commands:
+        group = command_group(cmd)
+        if group is None:
+            continue
+        limits.setdefault(group, GroupLimit()).tighten(
+            _number(cmd.get('group_concurrency'), 1, integer=True),
+            _number(cmd.get('group_per_minute'), 1, integer=True))
+    return {group: limit for group, limit in limits.items() if limit}
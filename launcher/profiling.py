@@ -0,0 +1,80 @@
+"""Optional profiling of launcher code paths, switched on by environment variable
+
+    LAUNCHER_PROFILE=cprofile      write <name>.prof for each profiled section
+    LAUNCHER_PROFILE=tracemalloc   write <name>.tracemalloc.txt with the top
+                                   allocation sites and the traced peak
+    LAUNCHER_PROFILE_DIR=PATH      where to write them (default: ./profiles)
+
+cProfile only sees the thread that entered the section; work done on the
+engine loop, the resource sampler or the history writer shows up as time
+spent waiting. tracemalloc covers every thread.
+"""
+import contextlib
+import os
+import sys
+from pathlib import Path
+
+ENV_VAR = 'LAUNCHER_PROFILE'
+DIR_ENV_VAR = 'LAUNCHER_PROFILE_DIR'
+MODES = ('cprofile', 'tracemalloc')
+TOP_ALLOCATIONS = 30
+
+
+def profile_mode():
+    """The requested profiler, or None when profiling is off"""
+    mode = os.environ.get(ENV_VAR, '').strip().lower()
+    if not mode:
+        return None
+    if mode not in MODES:
+        print(f"Ignoring {ENV_VAR}={mode!r}; expected one of {', '.join(MODES)}",
+              file=sys.stderr)
+        return None
+    return mode
+
+
+def profile_dir():
+    return Path(os.environ.get(DIR_ENV_VAR) or 'profiles')
+
+
+@contextlib.contextmanager
+def profiled(name):
+    """Profile the enclosed block if LAUNCHER_PROFILE asks for it; otherwise free"""
+    mode = profile_mode()
+    if mode is None:
+        yield
+        return
+
+    out_dir = profile_dir()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if mode == 'cprofile':
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            path = out_dir / f"{name}.prof"
+            profiler.dump_stats(str(path))
+            print(f"cProfile stats written to {path}", file=sys.stderr)
+        return
+
+    import tracemalloc
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(10)
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    try:
+        yield
+    finally:
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if started:
+            tracemalloc.stop()
+        path = out_dir / f"{name}.tracemalloc.txt"
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"Traced peak during {name}: {peak / 1024:.1f} KiB\n\n")
+            for stat in after.compare_to(before, 'lineno')[:TOP_ALLOCATIONS]:
+                f.write(f"{stat}\n")
+        print(f"tracemalloc report written to {path}", file=sys.stderr)
@@ -0,0 +1,361 @@
+"""Run background commands on agents (``main.py agent``) instead of locally
+
+An AgentPool is an executor backend for ExecutionEngine.run_with_policy:
+each command goes to the connected agent with the most free slots, and its
+status and output stream back over the agent's connection (see
+launcher.agent for the protocol). Agents are given as HOST:PORT addresses,
+on the command line or in LAUNCHER_AGENTS (comma-separated); the token
+comes from LAUNCHER_AGENT_TOKEN.
+"""
+import asyncio
+import base64
+import collections
+import itertools
+import os
+import sys
+import time
+
+from launcher.agent import (DEFAULT_PORT, MAX_LINE, PROTOCOL_VERSION, TOKEN_ENV_VAR,
+                            encode, read_message)
+from launcher.output import OutputCapture, log_file_name
+
+AGENTS_ENV_VAR = 'LAUNCHER_AGENTS'
+CONNECT_TIMEOUT = 5.0
+# Seconds stop_all waits for agents to report their commands stopped
+STOP_TIMEOUT = 5.0
+
+
+def parse_address(address):
+    """``(host, port)`` from ``HOST:PORT``, ``HOST`` or ``:PORT``; raises ValueError"""
+    host, sep, port = address.strip().rpartition(':')
+    if not sep:
+        host, port = port, ''
+    host = host.strip('[]') or '127.0.0.1'
+    if not port:
+        return host, DEFAULT_PORT
+    if not port.isdigit() or not 0 < int(port) < 65536:
+        raise ValueError(f"bad agent address {address!r}")
+    return host, int(port)
+
+
+def agent_addresses():
+    """Agent addresses configured through LAUNCHER_AGENTS"""
+    return [address.strip() for address in os.environ.get(AGENTS_ENV_VAR, '').split(',')
+            if address.strip()]
+
+
+def agent_token():
+    return os.environ.get(TOKEN_ENV_VAR) or None
+
+
+class RemoteRun:
+    """A command run on an agent; has the TrackedProcess fields reports and history use"""
+
+    def __init__(self, agent, job_id, name, command, cmd_id=None, output=None):
+        self.agent = agent
+        self.job_id = job_id
+        self.name = name
+        self.command = command
+        self.cmd_id = cmd_id
+        self.output = output
+        # The command's pid on the agent's machine, once it started
+        self.pid = None
+        self.pgid = None
+        self.metrics = None
+        self.start_time = time.time()
+        self.end_time = None
+        self.returncode = None
+        self.timed_out = False
+        self.force_killed = False
+        self.shutdown_seconds = None
+        self.error = None
+        self.done = asyncio.get_running_loop().create_future()
+
+    @property
+    def running(self):
+        return self.end_time is None
+
+    @property
+    def duration(self):
+        end = self.end_time if self.end_time is not None else time.time()
+        return end - self.start_time
+
+
+class AgentStats:
+    """What one agent got through, for throughput reports"""
+
+    def __init__(self):
+        self.started = 0
+        self.succeeded = 0
+        self.failed = 0
+        # Sum of the run times of finished commands
+        self.busy_seconds = 0.0
+        self.output_bytes = 0
+        self.first_start = None
+        self.last_end = None
+
+    @property
+    def finished(self):
+        return self.succeeded + self.failed
+
+    @property
+    def throughput(self):
+        """Finished commands per second between the first start and the last exit"""
+        if not self.finished or self.first_start is None:
+            return 0.0
+        elapsed = self.last_end - self.first_start
+        return self.finished / elapsed if elapsed > 0 else 0.0
+
+
+class AgentConnection:
+    """The launcher's side of one agent"""
+
+    def __init__(self, address, token=None):
+        self.address = address
+        self.host, self.port = parse_address(address)
+        self.token = token
+        self.name = address
+        self.slots = 0
+        self.running = 0
+        self.connected = False
+        # Why the agent is unusable: it could not be reached or was lost
+        self.error = None
+        self.stats = AgentStats()
+        self.runs = {}
+        self._writer = None
+        self._reader_task = None
+
+    @property
+    def free(self):
+        return self.slots - self.running if self.connected else 0
+
+    async def connect(self, on_lost):
+        """Open the connection and handshake; raises OSError on failure"""
+        try:
+            reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port, limit=MAX_LINE), CONNECT_TIMEOUT)
+            self._writer.write(encode({'type': 'hello', 'protocol': PROTOCOL_VERSION,
+                                       'token': self.token}))
+            ready = await asyncio.wait_for(read_message(reader), CONNECT_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.error = "no answer"
+        except (OSError, ValueError) as e:
+            self.error = str(e)
+        else:
+            if ready and ready.get('type') == 'ready':
+                self.name = str(ready.get('name') or self.address)
+                self.slots = max(1, int(ready.get('slots') or 1))
+                self.connected = True
+                self._reader_task = asyncio.get_running_loop().create_task(
+                    self._read_loop(reader, on_lost))
+                return
+            message = ready.get('message') if ready else "connection closed"
+            self.error = f"refused: {message}"
+        self.close()
+        raise OSError(f"agent {self.address}: {self.error}")
+
+    async def send(self, message):
+        if self._writer is None or self._writer.is_closing():
+            return
+        self._writer.write(encode(message))
+        try:
+            await self._writer.drain()
+        except ConnectionError:
+            # The read loop reports the lost agent
+            pass
+
+    def close(self):
+        self.connected = False
+        if self._writer is not None:
+            self._writer.close()
+
+    async def wait_closed(self):
+        if self._reader_task is not None:
+            await self._reader_task
+
+    async def _read_loop(self, reader, on_lost):
+        error = "connection closed"
+        try:
+            while True:
+                message = await read_message(reader)
+                if message is None:
+                    break
+                run = self.runs.get(message.get('id'))
+                if run is not None:
+                    self._handle(run, message)
+        except (ValueError, OSError) as e:
+            error = str(e)
+        lost = self.connected
+        if lost:
+            self.close()
+            self.error = f"lost: {error}"
+        # Whatever was running there is lost with the connection
+        for run in list(self.runs.values()):
+            run.error = f"lost agent {self.name}: {error}" if lost else "disconnected"
+            self._finish(run, None)
+        if lost:
+            on_lost(self)
+
+    def _handle(self, run, message):
+        kind = message.get('type')
+        if kind == 'output':
+            data = base64.b64decode(message.get('data', ''))
+            self.stats.output_bytes += len(data)
+            if run.output is not None:
+                run.output.write(data)
+            else:
+                sys.stdout.buffer.write(data)
+                sys.stdout.buffer.flush()
+        elif kind == 'started':
+            run.pid = message.get('pid')
+        elif kind == 'exit':
+            run.timed_out = bool(message.get('timed_out'))
+            self._finish(run, message.get('returncode'))
+        elif kind == 'failed':
+            run.error = message.get('message') or "failed to start"
+            self._finish(run, None)
+
+    def _finish(self, run, returncode):
+        if run.done.done():
+            return
+        self.runs.pop(run.job_id, None)
+        self.running -= 1
+        run.returncode = returncode
+        run.end_time = time.time()
+        if run.output is not None:
+            run.output.stream_closed()
+        stats = self.stats
+        stats.last_end = time.monotonic()
+        stats.busy_seconds += run.duration
+        if returncode == 0:
+            stats.succeeded += 1
+        else:
+            stats.failed += 1
+        run.done.set_result(run)
+
+
+class AgentPool:
+    """Executor backend that spreads commands over agents by free slots
+
+    Everything but ``__init__`` runs on the engine's loop. A command waits
+    while every agent is full; it fails with OSError if no agent is
+    connected, or if its agent is lost while it runs. ``on_exit(run)`` is
+    called as each command finishes, like ProcessTracker's ``on_exit``.
+    """
+
+    def __init__(self, addresses, token=None, on_exit=None):
+        self.agents = [AgentConnection(address, token) for address in addresses]
+        self.on_exit = on_exit
+        self._ids = itertools.count(1)
+        self._waiters = collections.deque()
+
+    @property
+    def connected(self):
+        return [agent for agent in self.agents if agent.connected]
+
+    @property
+    def total_slots(self):
+        return sum(agent.slots for agent in self.connected)
+
+    async def connect(self):
+        """Connect to every agent; returns the error messages of those that failed"""
+        results = await asyncio.gather(*(agent.connect(self._lost) for agent in self.agents),
+                                       return_exceptions=True)
+        return [str(result) for result in results if isinstance(result, Exception)]
+
+    def count(self):
+        """Number of commands running on agents"""
+        return sum(agent.running for agent in self.agents)
+
+    def records(self):
+        """Snapshot of the commands running on agents"""
+        return [run for agent in self.agents for run in agent.runs.values()]
+
+    async def run(self, cmd, capture=True, log_dir=None, timeout=None):
+        """Run a saved command on the agent with the most free slots; returns its RemoteRun"""
+        agent = await self._acquire()
+        job_id = next(self._ids)
+        output = None
+        if capture:
+            log_path = None
+            if log_dir is not None:
+                log_path = log_dir / log_file_name(f"{cmd['name']}-{agent.name}", job_id)
+            output = OutputCapture(log_path=log_path)
+            output.open_streams += 1
+        run = RemoteRun(agent, job_id, cmd['name'], cmd['command'], cmd.get('id'), output)
+        agent.runs[job_id] = run
+        agent.running += 1
+        if agent.stats.first_start is None:
+            agent.stats.first_start = time.monotonic()
+        agent.stats.started += 1
+        try:
+            await agent.send({'type': 'run', 'id': job_id, 'name': cmd['name'],
+                              'command': cmd['command'], 'timeout': timeout})
+            await asyncio.shield(run.done)
+        finally:
+            self._release()
+        if run.error is not None:
+            raise OSError(run.error)
+        if self.on_exit:
+            try:
+                self.on_exit(run)
+            except Exception as e:
+                print(f"Process exit handler failed: {e}")
+        return run
+
+    async def stop_all(self):
+        """Have the agents stop every command they run for us; returns how many
+
+        Waits up to STOP_TIMEOUT for the agents to report the commands gone.
+        """
+        runs = self.records()
+        for run in runs:
+            await run.agent.send({'type': 'kill', 'id': run.job_id})
+        if runs:
+            await asyncio.wait([run.done for run in runs], timeout=STOP_TIMEOUT)
+        return len(runs)
+
+    async def close(self):
+        """Disconnect from every agent; commands still running there are stopped"""
+        for agent in self.agents:
+            agent.close()
+        for agent in self.agents:
+            await agent.wait_closed()
+
+    def report(self):
+        """One line per agent: finished commands and throughput"""
+        lines = []
+        for agent in self.agents:
+            stats = agent.stats
+            state = f" ({agent.error})" if agent.error else ""
+            lines.append(f"Agent {agent.name}{state}: {stats.finished} finished, "
+                         f"{stats.failed} failed, {stats.throughput:.2f} commands/s, "
+                         f"busy {stats.busy_seconds:.1f}s over {agent.slots} slot(s)")
+        return lines
+
+    async def _acquire(self):
+        while True:
+            agents = self.connected
+            if not agents:
+                raise OSError("no agent connected")
+            best = max(agents, key=lambda agent: agent.free)
+            if best.free > 0:
+                return best
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            await waiter
+
+    def _release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    def _lost(self, agent):
+        print(f"Lost agent {agent.name}")
+        # Commands waiting for a slot re-pick, or fail if no agent is left
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
@@ -0,0 +1,75 @@
+import functools
+import shutil
+import subprocess
+import sys
+
+# Terminal emulators tried on Linux and other Unix-like systems, in order
+TERMINALS = ['gnome-terminal', 'konsole', 'xterm', 'xfce4-terminal']
+
+
+def background_options():
+    """Popen keyword arguments that give a background command its own process group"""
+    if sys.platform.startswith('win'):
+        return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {'start_new_session': True}
+
+
+def launch_background(command):
+    """Start a command with no visible terminal and return its Popen
+
+    The command gets its own process group (a new session on Unix), so it
+    can be stopped together with every child it starts.
+    """
+    return subprocess.Popen(command, shell=True, **background_options())
+
+
+def launch_in_terminal(command):
+    """Start a command in a new visible terminal window and return its Popen"""
+    if sys.platform.startswith('win'):
+        # Windows
+        return subprocess.Popen(['cmd', '/c', 'start', 'cmd', '/k', command], shell=True)
+
+    if sys.platform.startswith('darwin'):
+        # macOS
+        script = f'''
+        tell application "Terminal"
+            activate
+            do script "{command}"
+        end tell
+        '''
+        return subprocess.Popen(['osascript', '-e', script])
+
+    # Linux and other Unix-like systems
+    terminal = find_terminal()
+    if terminal is not None:
+        shell_command = f"{command}; read -p 'Press Enter to close...'"
+        try:
+            if terminal == 'gnome-terminal':
+                return subprocess.Popen([terminal, '--', 'bash', '-c', shell_command])
+            return subprocess.Popen([terminal, '-e', 'bash', '-c', shell_command])
+        except FileNotFoundError:
+            # Uninstalled since we looked
+            find_terminal.cache_clear()
+
+    # Fallback: run in background
+    return launch_background(command)
+
+
+@functools.lru_cache(maxsize=None)
+def find_terminal():
+    """The first installed terminal emulator from TERMINALS, or None
+
+    Looked up on PATH once per session instead of attempting to spawn
+    each candidate on every launch.
+    """
+    for terminal in TERMINALS:
+        if shutil.which(terminal):
+            return terminal
+    return None
+
+
+def launch_command(cmd, background):
+    """Start a saved command either in the background or in a terminal window"""
+    if background:
+        return launch_background(cmd['command'])
+    return launch_in_terminal(cmd['command'])
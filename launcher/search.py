@@ -0,0 +1,167 @@
+import bisect
+import re
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Lower-cased word tokens of a name or command line"""
+    return TOKEN_RE.findall(text.lower())
+
+
+def command_tokens(cmd):
+    """The words a command is indexed under (safe to call off the Tk thread)"""
+    return frozenset(tokenize(cmd['name'])) | frozenset(tokenize(cmd['command']))
+
+
+class CommandIndex:
+    """Prefix index over the name and command text of saved commands
+
+    Every word in a command maps to the set of command ids containing it, and
+    the words themselves are kept in a sorted vocabulary so a prefix lookup
+    is a bisect plus a short scan. Prefixes of up to SHORT_PREFIX characters
+    match so many words that the union is slow, so the result for the last
+    SHORT_CACHE such prefixes is kept and updated along with the postings.
+    A query matches a command when every query word is a prefix of some
+    word in that command. Adding, editing and removing a command only
+    touches that command's own words.
+    """
+
+    SHORT_PREFIX = 2
+    SHORT_CACHE = 64
+
+    def __init__(self):
+        self._postings = {}
+        self._short = {}
+        self._vocabulary = []
+        self._tokens = {}
+
+    def build(self, commands):
+        """Index a whole catalog from scratch"""
+        self._postings = {}
+        self._short = {}
+        self._vocabulary = []
+        self._tokens = {}
+        self.extend((cmd['id'], command_tokens(cmd)) for cmd in commands)
+
+    def extend(self, entries):
+        """Index new commands given as ``(id, command_tokens(cmd))`` pairs
+
+        Cheaper than ``add`` per command: the vocabulary is re-sorted once.
+        """
+        new_words = []
+        for cmd_id, tokens in entries:
+            self.remove(cmd_id)
+            self._insert(cmd_id, tokens, new_words)
+        if new_words:
+            # Two sorted runs, which sort() merges in linear time
+            new_words.sort()
+            self._vocabulary += new_words
+            self._vocabulary.sort()
+
+    def add(self, cmd):
+        """Index a new command, or re-index an edited one"""
+        self.remove(cmd['id'])
+        new_words = []
+        self._insert(cmd['id'], command_tokens(cmd), new_words)
+        for token in new_words:
+            bisect.insort(self._vocabulary, token)
+
+    update = add
+
+    def remove(self, cmd_id):
+        """Forget a command"""
+        tokens = self._tokens.pop(cmd_id, ())
+        for token in tokens:
+            postings = self._postings[token]
+            postings.discard(cmd_id)
+            if not postings:
+                del self._postings[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+        for prefix in self._short_prefixes(tokens):
+            self._short[prefix].discard(cmd_id)
+
+    def search(self, query):
+        """Ids of commands matching every word of the query; None for an empty query"""
+        terms = set(tokenize(query))
+        if not terms:
+            return None
+
+        result = None
+        # Short terms are one cached set each; intersect from the smallest
+        short = sorted((self._short_postings(term) for term in terms
+                        if len(term) <= self.SHORT_PREFIX), key=len)
+        for postings in short:
+            if result is None:
+                if len(postings) == len(self._tokens):
+                    # Matches everything, so it narrows nothing
+                    continue
+                result = set(postings)
+            else:
+                result &= postings
+            if not result:
+                return set()
+
+        # Start from the term matching the fewest words in the vocabulary
+        ranges = sorted((self._prefix_range(term) + (term,) for term in terms
+                         if len(term) > self.SHORT_PREFIX),
+                        key=lambda r: r[1] - r[0])
+        for start, stop, term in ranges:
+            if result is None:
+                result = self._union(start, stop)
+                if len(result) == len(self._tokens):
+                    result = None
+                    continue
+            elif stop - start > len(result) // 4:
+                # Broad prefix: checking the few remaining candidates beats a big union
+                result = {cmd_id for cmd_id in result
+                          if any(token.startswith(term) for token in self._tokens[cmd_id])}
+            else:
+                result &= self._union(start, stop)
+            if not result:
+                return set()
+        return set(self._tokens) if result is None else result
+
+    def _insert(self, cmd_id, tokens, new_words):
+        self._tokens[cmd_id] = tokens
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                self._postings[token] = {cmd_id}
+                new_words.append(token)
+            else:
+                postings.add(cmd_id)
+        for prefix in self._short_prefixes(tokens):
+            self._short[prefix].add(cmd_id)
+
+    def _short_prefixes(self, tokens):
+        # The cached short prefixes some of these words start with
+        if not self._short:
+            return ()
+        return {token[:length] for token in tokens
+                for length in range(1, self.SHORT_PREFIX + 1)} & self._short.keys()
+
+    def _short_postings(self, prefix):
+        postings = self._short.get(prefix)
+        if postings is None:
+            postings = self._union(*self._prefix_range(prefix))
+            if len(self._short) >= self.SHORT_CACHE:
+                del self._short[next(iter(self._short))]
+            self._short[prefix] = postings
+        return postings
+
+    def _prefix_range(self, prefix):
+        vocabulary = self._vocabulary
+        start = bisect.bisect_left(vocabulary, prefix)
+        stop = bisect.bisect_left(vocabulary, prefix + '\U0010ffff', start)
+        return start, stop
+
+    def _union(self, start, stop):
+        sets = [self._postings[token] for token in self._vocabulary[start:stop]]
+        if len(sets) == 1:
+            # Copy so callers can't mutate the posting set
+            return set(sets[0])
+        return set().union(*sets)
+
+    def __len__(self):
+        return len(self._tokens)
@@ -0,0 +1,125 @@
+"""Pre-spawned shells that background commands start in, skipping a fork+exec
+
+Starting a background command normally means spawning ``/bin/sh -c``,
+which is most of the launch latency for small commands. A warm shell is
+spawned ahead of time, already in its own session with its output pipe in
+place, and blocks reading one line from stdin. Launching a command writes
+the command line to it; the shell evals it and exits with its status, so
+the warm shell's Popen stands in for the command exactly as a fresh one
+would (same pid, process group, exit code and output pipe).
+"""
+import collections
+import os
+import subprocess
+
+SHELL = '/bin/sh'
+# Wait for one command line, detach stdin and run it in this very shell.
+# ``read`` fails on EOF, so idle shells exit quietly when the pool closes.
+WORKER_SCRIPT = ('IFS= read -r __launcher_cmd || exit 0; exec </dev/null; '
+                 'eval "unset __launcher_cmd; $__launcher_cmd"')
+
+
+def supported():
+    """Warm shells need a POSIX shell"""
+    return os.name != 'nt' and os.path.exists(SHELL)
+
+
+def accepts(command):
+    """Whether a command can be sent to a warm shell (a single line)"""
+    return '\n' not in command and '\r' not in command and '\0' not in command
+
+
+class WarmShell:
+    """One idle shell waiting for its command"""
+
+    def __init__(self, capture=True):
+        self.read_fd = None
+        streams = {}
+        if capture:
+            self.read_fd, write_fd = os.pipe()
+            streams = {'stdout': write_fd, 'stderr': write_fd}
+        try:
+            self.process = subprocess.Popen([SHELL, '-c', WORKER_SCRIPT], stdin=subprocess.PIPE,
+                                            start_new_session=True, **streams)
+        except BaseException:
+            if capture:
+                os.close(self.read_fd)
+            raise
+        finally:
+            if capture:
+                os.close(write_fd)
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def run(self, command):
+        """Hand over the command; returns the Popen, now running the command
+
+        Raises OSError if the shell died while idle.
+        """
+        self.process.stdin.write(os.fsencode(command) + b'\n')
+        self.process.stdin.close()
+        self.process.args = command
+        return self.process
+
+    def discard(self):
+        """Let an unused shell exit and release its pipe"""
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        if self.read_fd is not None:
+            os.close(self.read_fd)
+            self.read_fd = None
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+class ShellPool:
+    """A few idle WarmShells, refilled after each one is taken
+
+    ``take`` returns an idle shell or None when the pool is empty, in which
+    case the caller spawns the command the ordinary way. Callers should
+    ``fill`` after taking, once the command is on its way, so replacing
+    the shell stays off the launch path. Not thread-safe: the execution
+    engine only uses it from its loop thread. Shells inherit the
+    environment and working directory the launcher had when they were
+    spawned.
+    """
+
+    def __init__(self, size=4, capture=True):
+        self.size = size
+        self.capture = capture
+        self.hits = 0
+        self.misses = 0
+        self._idle = collections.deque()
+        self._closed = False
+
+    def fill(self):
+        """Spawn shells until ``size`` are idle"""
+        while not self._closed and len(self._idle) < self.size:
+            try:
+                self._idle.append(WarmShell(self.capture))
+            except OSError as e:
+                print(f"Could not start a warm shell: {e}")
+                return
+
+    def take(self):
+        """An idle, still running shell, or None"""
+        while self._idle:
+            shell = self._idle.popleft()
+            if shell.alive():
+                self.hits += 1
+                return shell
+            shell.discard()
+        self.misses += 1
+        return None
+
+    def close(self):
+        """Stop every idle shell; shells already running commands are unaffected"""
+        self._closed = True
+        while self._idle:
+            self._idle.popleft().discard()
@@ -0,0 +1,161 @@
+"""Stopping background commands together with everything they started
+
+Background commands run in their own session (POSIX) or process group
+(Windows), so a signal sent to the group also reaches the servers, build
+workers and other children the command's shell spawned.
+"""
+import os
+import signal
+import subprocess
+import time
+
+PROC = '/proc'
+POLL_INTERVAL = 0.02
+
+
+def signal_tree(record, force=False):
+    """Ask a tracked process and its group to stop; ``force`` kills outright
+
+    Returns False if the process was already gone.
+    """
+    if os.name == 'nt':
+        try:
+            if force:
+                # taskkill /T follows the parent/child tree rather than the group
+                subprocess.run(['taskkill', '/F', '/T', '/PID', str(record.pid)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            else:
+                record.process.send_signal(signal.CTRL_BREAK_EVENT)
+        except OSError:
+            return False
+        return True
+
+    sig = signal.SIGKILL if force else signal.SIGTERM
+    try:
+        if record.pgid is not None:
+            os.killpg(record.pgid, sig)
+        else:
+            os.kill(record.pid, sig)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def live_groups():
+    """Process groups with at least one member that is not a zombie
+
+    Reads /proc, so it returns None on systems without it. Needed because
+    orphaned children that were killed may linger as zombies, and those
+    still count as group members for ``killpg(pgid, 0)``.
+    """
+    if not os.path.isdir(PROC):
+        return None
+    groups = set()
+    for entry in os.listdir(PROC):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'{PROC}/{entry}/stat', 'r') as f:
+                # Fields after the command name: state, ppid, pgrp, ...
+                state, _, pgrp = f.read().rsplit(')', 1)[1].split(None, 3)[:3]
+        except (OSError, ValueError):
+            continue
+        if state not in ('Z', 'X'):
+            groups.add(int(pgrp))
+    return groups
+
+
+def group_exists(pgid):
+    """Whether process group ``pgid`` has any member left, zombies included
+
+    A group that has been seen empty is gone for good: nothing can join it
+    again, and a later group with the same number is someone else's.
+    """
+    try:
+        # Signal 0 only checks that some member of the group still exists
+        os.killpg(pgid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def tree_alive(record, groups=None):
+    """Whether the process or anything left in its group is still running
+
+    ``groups`` is a result of ``live_groups()``, so that checking many
+    records costs a single pass over /proc.
+    """
+    if os.name == 'nt' or record.pgid is None:
+        return record.running
+    if groups is None:
+        groups = live_groups()
+    if groups is not None:
+        return record.pgid in groups
+    return group_exists(record.pgid)
+
+
+def wait_for_trees(records, deadline):
+    """Wait until every tree has exited or ``deadline`` passes
+
+    Returns ``{record: finished_at}`` for the trees that exited.
+    """
+    finished = {}
+    pending = list(records)
+    while pending:
+        still_running = []
+        now = time.monotonic()
+        groups = live_groups() if os.name != 'nt' else None
+        for record in pending:
+            if tree_alive(record, groups):
+                still_running.append(record)
+            else:
+                finished[record] = now
+        pending = still_running
+        if not pending or now >= deadline:
+            break
+        time.sleep(min(POLL_INTERVAL, max(0.0, deadline - now)))
+    return finished
+
+
+def shutdown_processes(records, timeout=3.0, kill_timeout=1.0):
+    """Stop process trees: SIGTERM every group, wait, then SIGKILL stragglers
+
+    All groups are signalled before any waiting starts, so they shut down in
+    parallel and the whole call takes at most ``timeout + kill_timeout``.
+    Sets ``shutdown_seconds`` and ``force_killed`` on each record and
+    returns the records that survived even SIGKILL (normally none).
+    """
+    started = time.monotonic()
+    for record in records:
+        signal_tree(record)
+
+    finished = wait_for_trees(records, started + timeout)
+    stubborn = [record for record in records if record not in finished]
+    for record in stubborn:
+        record.force_killed = True
+        signal_tree(record, force=True)
+    if stubborn:
+        finished.update(wait_for_trees(stubborn, time.monotonic() + kill_timeout))
+
+    for record in records:
+        if record in finished:
+            record.shutdown_seconds = finished[record] - started
+    return [record for record in records if record not in finished]
+
+
+def describe_shutdown(records):
+    """Summary line for a finished shutdown, naming the slowest process"""
+    timed = [record for record in records if record.shutdown_seconds is not None]
+    killed = sum(1 for record in records if record.force_killed)
+    message = f"Terminated {len(timed)} background process(es)"
+    if timed:
+        slowest = max(timed, key=lambda record: record.shutdown_seconds)
+        message += (f" in {slowest.shutdown_seconds:.2f}s"
+                    f" (slowest: {slowest.name})")
+    if killed:
+        message += f", {killed} force-killed"
+    if len(timed) < len(records):
+        message += f", {len(records) - len(timed)} could not be stopped"
+    return message
@@ -0,0 +1,391 @@
+import json
+import marshal
+import os
+import re
+import sys
+import threading
+from pathlib import Path
+
+# Bump when the layout of the binary snapshot cache changes
+CACHE_VERSION = 2
+
+_WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+
+
+def default_data_dir():
+    """Directory holding commands.json (next to the executable or main.py)"""
+    if getattr(sys, 'frozen', False):
+        # Running as compiled executable
+        return Path(sys.executable).parent
+    # Running as script
+    return Path(__file__).resolve().parent.parent
+
+
+def read_commands(path):
+    """Read the saved command list, replaying any journaled edits"""
+    return CommandStore(path).load()
+
+
+def write_commands(path, commands, next_id=None):
+    """Atomically replace a commands file: write a temp file, then rename it over
+
+    With ``next_id`` the file is ``{"next_id": N, "commands": [...]}`` rather
+    than a bare list, so ids of deleted commands are never handed out again.
+    """
+    if next_id is not None:
+        commands = {'next_id': next_id, 'commands': commands}
+    write_json(path, commands)
+
+
+def write_json(path, data, indent=2):
+    """Atomically replace a JSON file with ``data``"""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def iter_json_array(text, batch_size=2000):
+    """Decode a top-level JSON list one element at a time, yielding batches"""
+    yield from _iter_array(text, _WHITESPACE_RE.match(text, 0).end(), batch_size)
+
+
+def iter_json_snapshot(text, batch_size=2000, meta=None):
+    """Decode a commands file in batches, as a bare list or as an object
+
+    In the object form the list is under ``commands``; every other key
+    (``next_id``) is stored in ``meta``.
+    """
+    index = _WHITESPACE_RE.match(text, 0).end()
+    if text[index:index + 1] != '{':
+        yield from _iter_array(text, index, batch_size)
+        return
+
+    decoder = json.JSONDecoder()
+    index = _WHITESPACE_RE.match(text, index + 1).end()
+    while text[index:index + 1] != '}':
+        key, index = decoder.raw_decode(text, index)
+        index = _WHITESPACE_RE.match(text, index).end()
+        if text[index:index + 1] != ':':
+            raise ValueError(f"Expected ':' at position {index} of the commands file")
+        index = _WHITESPACE_RE.match(text, index + 1).end()
+        if key == 'commands':
+            index = yield from _iter_array(text, index, batch_size)
+        else:
+            value, index = decoder.raw_decode(text, index)
+            if meta is not None:
+                meta[key] = value
+        index = _WHITESPACE_RE.match(text, index).end()
+        separator = text[index:index + 1]
+        if separator == '}':
+            break
+        if separator != ',':
+            raise ValueError(f"Expected ',' or '}}' at position {index} of the commands file")
+        index = _WHITESPACE_RE.match(text, index + 1).end()
+
+
+def _iter_array(text, index, batch_size):
+    # Yields batches of the list starting at ``index``; returns the index after it
+    decoder = json.JSONDecoder()
+    if text[index:index + 1] != '[':
+        raise ValueError("commands file must contain a JSON list")
+    index = _WHITESPACE_RE.match(text, index + 1).end()
+    if text[index:index + 1] == ']':
+        return index + 1
+
+    batch = []
+    while True:
+        item, index = decoder.raw_decode(text, index)
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+        index = _WHITESPACE_RE.match(text, index).end()
+        separator = text[index:index + 1]
+        if separator == ']':
+            break
+        if separator != ',':
+            raise ValueError(f"Expected ',' or ']' at position {index} of the commands file")
+        index = _WHITESPACE_RE.match(text, index + 1).end()
+
+    if batch:
+        yield batch
+    return index + 1
+
+
+class CommandStore:
+    """commands.json snapshot plus an append-only journal of individual edits
+
+    Each add, update or remove is appended to ``<file>.journal`` as one JSON
+    line, so an edit costs O(1) I/O however large the catalog is. Once the
+    journal holds ``compact_every`` operations it is folded into a fresh
+    snapshot on a background thread; the snapshot is written to a temp file
+    and renamed into place, so a crash never leaves a half-written
+    commands.json. Replaying the journal is idempotent, which makes a crash
+    in the middle of a compaction safe as well.
+
+    Next to the snapshot sits ``<file>.cache``, a marshal dump of the same
+    list keyed on the snapshot's size and mtime; while it matches, warm
+    starts skip JSON parsing altogether.
+
+    ``next_id`` is the lowest id a new command may get. It only ever goes
+    up and is saved in the snapshot, so a deleted command's id is never
+    reused (history and the result cache are keyed by id).
+    """
+
+    def __init__(self, path, compact_every=1000):
+        self.path = Path(path)
+        self.journal_path = self.path.with_name(self.path.name + '.journal')
+        self.compacting_path = self.path.with_name(self.path.name + '.journal.compacting')
+        self.cache_path = self.path.with_name(self.path.name + '.cache')
+        self.compact_every = compact_every
+
+        self.source = None
+        self.next_id = 1
+        self.pending_ops = 0
+        self.snapshot_from_cache = False
+        self._snapshot_key = None
+        self._journal = None
+        self._lock = threading.Lock()
+        self._compactor = None
+
+    def load(self):
+        """Read the snapshot and replay journals left by earlier sessions"""
+        commands = []
+        for batch in self.iter_snapshot():
+            commands.extend(batch)
+        if not self.snapshot_from_cache and commands:
+            self.write_cache(commands)
+
+        ops = self.read_journals()
+        return replay(commands, ops) if ops else commands
+
+    def iter_snapshot(self, batch_size=2000):
+        """Yield the snapshot in batches, from the binary cache when it is fresh"""
+        self.snapshot_from_cache = False
+        if not self.path.exists():
+            return
+        self._snapshot_key = self._stat_key()
+
+        cached = self._read_cache(self._snapshot_key)
+        if cached is not None:
+            self.snapshot_from_cache = True
+            cached, next_id = cached
+            self._reserve(next_id)
+            for start in range(0, len(cached), batch_size):
+                yield cached[start:start + batch_size]
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        meta = {}
+        for batch in iter_json_snapshot(text, batch_size, meta):
+            self._reserve(meta.get('next_id'))
+            yield batch
+        self._reserve(meta.get('next_id'))
+
+    def read_journals(self):
+        """Journaled operations not yet folded into the snapshot, oldest first"""
+        # A compaction interrupted by a crash leaves its journal behind
+        ops = self._read_journal(self.compacting_path) + self._read_journal(self.journal_path)
+        self.pending_ops = len(ops)
+        for op in ops:
+            if op.get('op') == 'add':
+                self._reserve(op['cmd'].get('id'), after=True)
+        return ops
+
+    def write_cache(self, commands, key=None, next_id=None):
+        """Save a binary copy of the snapshot just read, for faster warm starts"""
+        key = key or self._snapshot_key
+        if key is None:
+            return
+        if next_id is None:
+            next_id = self.next_id
+        tmp_path = self.cache_path.with_name(self.cache_path.name + '.tmp')
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(marshal.dumps((CACHE_VERSION, key, commands, next_id)))
+            os.replace(tmp_path, self.cache_path)
+        except (OSError, ValueError):
+            # The cache is only an optimization
+            pass
+
+    def record_add(self, cmd):
+        self._reserve(cmd.get('id'), after=True)
+        self._append({'op': 'add', 'cmd': cmd})
+
+    def record_update(self, cmd_id, fields):
+        self._append({'op': 'update', 'id': cmd_id, 'fields': fields})
+
+    def record_remove(self, cmd_ids):
+        self._append({'op': 'remove', 'ids': list(cmd_ids)})
+
+    def compact(self, commands=None, background=True):
+        """Fold the journal into a new snapshot of ``commands`` (default: ``source()``)"""
+        self.wait()
+        if commands is None:
+            commands = self.source()
+        # Copy now so later in-place edits can't leak into the snapshot being written
+        commands = [dict(cmd) for cmd in commands]
+        for cmd in commands:
+            self._reserve(cmd.get('id'), after=True)
+        next_id = self.next_id
+
+        with self._lock:
+            # Edits from here on go to a fresh journal
+            self._close_journal()
+            if self.journal_path.exists():
+                if self.compacting_path.exists():
+                    # An earlier compaction never finished; keep its operations too
+                    with open(self.compacting_path, 'ab') as dst, \
+                            open(self.journal_path, 'rb') as src:
+                        dst.write(src.read())
+                    os.remove(self.journal_path)
+                else:
+                    os.replace(self.journal_path, self.compacting_path)
+            self.pending_ops = 0
+
+        if background:
+            self._compactor = threading.Thread(target=self._write_snapshot,
+                                               args=(commands, next_id),
+                                               name="launcher-compactor")
+            self._compactor.daemon = True
+            self._compactor.start()
+        else:
+            self._write_snapshot(commands, next_id)
+
+    def compacting(self):
+        """Whether a background compaction is still writing"""
+        return self._compactor is not None and self._compactor.is_alive()
+
+    def wait(self):
+        """Wait for a background compaction to finish"""
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+
+    def close(self):
+        self.wait()
+        with self._lock:
+            self._close_journal()
+
+    def _append(self, op):
+        line = json.dumps(op, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        with self._lock:
+            if self._journal is None:
+                self._journal = self._open_journal()
+            self._journal.write(line + b'\n')
+            self._journal.flush()
+            self.pending_ops += 1
+            due = self.pending_ops >= self.compact_every
+        if due and self.source is not None and not self.compacting():
+            self.compact()
+
+    def _write_snapshot(self, commands, next_id):
+        write_commands(self.path, commands, next_id)
+        self.write_cache(commands, self._stat_key(), next_id)
+        try:
+            os.remove(self.compacting_path)
+        except FileNotFoundError:
+            pass
+
+    def _stat_key(self):
+        stat = self.path.stat()
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def _read_cache(self, key):
+        try:
+            with open(self.cache_path, 'rb') as f:
+                # One read plus loads() is far faster than load() on a file
+                version, cached_key, commands, next_id = marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if version != CACHE_VERSION or tuple(cached_key) != key:
+            return None
+        return commands, next_id
+
+    def _reserve(self, cmd_id, after=False):
+        # Raise next_id to cmd_id (past it with ``after``); ignores non-ids
+        if isinstance(cmd_id, int) and not isinstance(cmd_id, bool):
+            self.next_id = max(self.next_id, cmd_id + 1 if after else cmd_id)
+
+    def _open_journal(self):
+        # Binary, so a line torn inside a multibyte character can't break the file
+        journal = open(self.journal_path, 'a+b')
+        # Start on a fresh line if the last session died mid-append
+        if journal.tell() > 0:
+            journal.seek(journal.tell() - 1)
+            if journal.read(1) != b'\n':
+                journal.write(b'\n')
+        return journal
+
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    @staticmethod
+    def _read_journal(path):
+        if not path.exists():
+            return []
+        ops = []
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    ops.append(json.loads(line.decode('utf-8')))
+                except ValueError:
+                    # A torn line from a crash mid-append (UnicodeDecodeError included)
+                    continue
+        return ops
+
+
+def replay(commands, ops):
+    """Apply journaled operations to a command list; safe to apply twice"""
+    by_id = {cmd.get('id'): index for index, cmd in enumerate(commands)}
+    removed = set()
+    for op in ops:
+        kind = op.get('op')
+        if kind == 'add':
+            cmd = op['cmd']
+            index = by_id.get(cmd.get('id'))
+            if index is None:
+                by_id[cmd.get('id')] = len(commands)
+                commands.append(cmd)
+            else:
+                commands[index] = cmd
+            removed.discard(cmd.get('id'))
+        elif kind == 'update':
+            index = by_id.get(op['id'])
+            if index is not None and op['id'] not in removed:
+                commands[index].update(op['fields'])
+        elif kind == 'remove':
+            for cmd_id in op['ids']:
+                if cmd_id in by_id:
+                    removed.add(cmd_id)
+    return [cmd for cmd in commands if cmd.get('id') not in removed]
+
+
+def replay_into_model(model, ops):
+    """Apply journaled operations to a CommandModel; returns the ids touched"""
+    touched = set()
+    for op in ops:
+        kind = op.get('op')
+        if kind == 'add':
+            cmd = op['cmd']
+            if cmd.get('id') in model:
+                model.update(cmd['id'], **cmd)
+                touched.add(cmd['id'])
+            else:
+                touched.update(model.extend([cmd]))
+        elif kind == 'update':
+            if op['id'] in model:
+                model.update(op['id'], **op['fields'])
+                touched.add(op['id'])
+        elif kind == 'remove':
+            model.remove(op['ids'])
+            touched.update(op['ids'])
+    return touched
@@ -0,0 +1,113 @@
+import collections
+import os
+import threading
+import time
+
+
+class TrackedProcess:
+    """A background process plus its exit status once its owner reaps it"""
+
+    def __init__(self, process, name, command, cmd_id=None):
+        self.process = process
+        self.pid = process.pid
+        self.name = name
+        self.command = command
+        self.cmd_id = cmd_id
+        self.start_time = time.time()
+        self.end_time = None
+        self.returncode = None
+        self.output = None
+        self.metrics = None
+        # Set when the process leads its own process group (see runner)
+        self.pgid = None
+        if os.name != 'nt':
+            try:
+                if os.getpgid(self.pid) == self.pid:
+                    self.pgid = self.pid
+            except OSError:
+                pass
+        # Filled in when the launcher stops the process
+        self.shutdown_seconds = None
+        self.force_killed = False
+        self.timed_out = False
+        self._exited = threading.Event()
+
+    @property
+    def running(self):
+        return not self._exited.is_set()
+
+    @property
+    def duration(self):
+        end = self.end_time if self.end_time is not None else time.time()
+        return end - self.start_time
+
+    def wait(self, timeout=None):
+        """Block until the tracker has seen the process exit; returns the exit code"""
+        self._exited.wait(timeout)
+        return self.returncode
+
+
+class ProcessTracker:
+    """Registry of background processes and their exits
+
+    Whoever starts a process (e.g. the execution engine) waits for its exit
+    and drains its pipes, registers it with ``adopt`` and calls ``finish``
+    once it exits; the tracker keeps the running records, a history of
+    recent exits and the ``on_start``/``on_exit`` hooks. Counts are kept
+    incrementally, so ``count()`` is O(1).
+    """
+
+    def __init__(self, on_exit=None, history=500, on_start=None):
+        self.on_exit = on_exit
+        self.on_start = on_start
+
+        self._lock = threading.Lock()
+        self._running = {}
+        self.recent = collections.deque(maxlen=history)
+        self.started_count = 0
+        self.finished_count = 0
+
+    def adopt(self, process, name, command, output=None, cmd_id=None):
+        """Register a process that something else waits on and drains
+
+        The owner (e.g. the execution engine) calls ``finish`` when the
+        process exits. ``cmd_id`` ties the run to a saved command.
+        """
+        record = TrackedProcess(process, name, command, cmd_id)
+        record.output = output
+        with self._lock:
+            self._running[record.pid] = record
+            self.started_count += 1
+        if self.on_start:
+            try:
+                self.on_start(record)
+            except Exception as e:
+                print(f"Process start handler failed: {e}")
+        return record
+
+    def count(self):
+        """Number of tracked processes that are still running"""
+        return len(self._running)
+
+    def records(self):
+        """Snapshot of the running process records"""
+        with self._lock:
+            return list(self._running.values())
+
+    def finish(self, record, returncode):
+        """Record a tracked process's exit and notify ``on_exit``"""
+        record.returncode = returncode
+        record.end_time = time.time()
+        with self._lock:
+            # The pid may already belong to a new child, so check identity
+            if self._running.get(record.pid) is record:
+                del self._running[record.pid]
+            self.finished_count += 1
+            self.recent.append(record)
+        record._exited.set()
+
+        if self.on_exit:
+            try:
+                self.on_exit(record)
+            except Exception as e:
+                print(f"Process exit handler failed: {e}")
@@ -0,0 +1,65 @@
+import queue
+
+
+class Frame:
+    """Everything posted to an UpdateBus between two drains"""
+
+    def __init__(self):
+        self.calls = []
+        self.marks = {}
+        self.events = 0
+
+    def __bool__(self):
+        return self.events > 0
+
+    def marked(self, kind):
+        """Whether ``kind`` was marked at all in this frame"""
+        return kind in self.marks
+
+    def keys(self, kind):
+        """The distinct keys marked for ``kind`` (None for keyless marks excluded)"""
+        return {key for key in self.marks.get(kind, ()) if key is not None}
+
+
+class UpdateBus:
+    """Hand UI updates from worker threads to the Tk thread, a frame at a time
+
+    Workers never touch widgets: ``call`` and ``mark`` only append to a
+    queue and are safe from any thread. The Tk thread calls ``drain`` on a
+    fixed timer and gets one Frame holding every event posted since the
+    previous drain. Marks are coalesced, so a thousand processes changing
+    state between two frames cost one status update rather than a
+    thousand; calls are kept, in posting order.
+    """
+
+    _CALL = 0
+    _MARK = 1
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+
+    def call(self, func, *args):
+        """Run ``func(*args)`` on the Tk thread at the next frame"""
+        self._queue.put((self._CALL, func, args))
+
+    def mark(self, kind, key=None):
+        """Flag something as changed, e.g. ``mark('timing', cmd_id)``
+
+        Repeated marks of the same kind and key within a frame collapse.
+        """
+        self._queue.put((self._MARK, kind, key))
+
+    def drain(self, max_events=None):
+        """Take up to ``max_events`` queued events (all by default) as a Frame"""
+        frame = Frame()
+        while max_events is None or frame.events < max_events:
+            try:
+                tag, first, second = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            frame.events += 1
+            if tag == self._CALL:
+                frame.calls.append((first, second))
+            else:
+                frame.marks.setdefault(first, set()).add(second)
+        return frame
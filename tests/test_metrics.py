@@ -0,0 +1,26 @@
+import subprocess
+
+import pytest
+
+from launcher.metrics import ProcessMetrics, ResourceSampler, metrics_available
+from launcher.tracker import ProcessTracker
+
+
+@pytest.mark.skipif(not metrics_available(), reason="needs /proc")
+def test_first_sample_keeps_series_aligned():
+    tracker = ProcessTracker()
+    process = subprocess.Popen(['sleep', '5'])
+    try:
+        record = tracker.adopt(process, "sleep", "sleep 5")
+        sampler = ResourceSampler(tracker)
+        sampler.sample()
+        assert record.metrics.times.samples == 1
+        sampler.sample()
+    finally:
+        process.kill()
+        process.wait()
+
+    lengths = {field: len(series.values()) for field, series in record.metrics.series.items()}
+    assert set(lengths.values()) == {len(record.metrics.times.values())} == {2}
+    assert record.metrics.series['rss_bytes'].peak > 0
+    assert set(record.metrics.summary()) == {'samples'} | set(ProcessMetrics.FIELDS)
@@ -0,0 +1,56 @@
+import copy
+
+from launcher.model import CommandModel
+from launcher.storage import CommandStore, write_commands
+
+
+def test_batched_extend_numbers_like_load(tmp_path):
+    path = tmp_path / "commands.json"
+    write_commands(path, [
+        {'name': "hand-added", 'command': "echo hi"},
+        {'id': 1, 'name': "build", 'command': "make"},
+        {'id': 1, 'name': "duplicate", 'command': "make again"},
+        {'id': 2, 'name': "deploy", 'command': "./deploy"},
+    ])
+    store = CommandStore(path)
+    commands = store.load()
+
+    loaded = CommandModel()
+    loaded.load(copy.deepcopy(commands))
+
+    batched = CommandModel()
+    for batch in store.iter_snapshot(batch_size=1):
+        batched.extend(batch, defer=True)
+    batched.assign_deferred()
+
+    def rows(model):
+        return [(cmd['id'], cmd['name']) for cmd in model.to_list()]
+
+    assert rows(batched) == rows(loaded)
+    assert rows(loaded) == [(3, "hand-added"), (1, "build"), (4, "duplicate"), (2, "deploy")]
+
+
+def test_deleted_id_is_not_reused_after_compaction(tmp_path):
+    path = tmp_path / "commands.json"
+    store = CommandStore(path)
+    model = CommandModel()
+    for name in ("build", "deploy"):
+        store.record_add(model.add({'name': name, 'command': "true"}))
+    store.record_remove([cmd['id'] for cmd in model.remove([2])])
+    store.compact(model.to_list(), background=False)
+    store.close()
+
+    # Once from the binary cache the compaction wrote, once from the JSON
+    for from_cache in (True, False):
+        if not from_cache:
+            store.cache_path.unlink()
+        store = CommandStore(path)
+        model = CommandModel()
+        for batch in store.iter_snapshot():
+            model.extend(batch, defer=True)
+        assert store.snapshot_from_cache == from_cache
+        store.read_journals()
+        model.reserve_ids(store.next_id)
+        model.assign_deferred()
+        assert model.add({'name': "new", 'command': "true"})['id'] == 3
+        store.close()
@@ -0,0 +1,22 @@
+from launcher.storage import CommandStore, read_commands, write_commands
+
+
+def test_torn_multibyte_journal_line_is_skipped(tmp_path):
+    path = tmp_path / "commands.json"
+    write_commands(path, [{'id': 1, 'name': "build", 'command': "make"}])
+    store = CommandStore(path)
+    store.record_add({'id': 2, 'name': "déploiement ☃", 'command': "./deploy"})
+    store.close()
+
+    # Cut the last line in the middle of the snowman's three bytes
+    data = store.journal_path.read_bytes()
+    cut = data.index("☃".encode('utf-8')) + 1
+    store.journal_path.write_bytes(data[:cut])
+
+    assert [cmd['id'] for cmd in read_commands(path)] == [1]
+
+    # Later edits still append and are read back
+    store = CommandStore(path)
+    store.record_add({'id': 3, 'name': "tëst", 'command': "true"})
+    store.close()
+    assert [cmd['id'] for cmd in read_commands(path)] == [1, 3]